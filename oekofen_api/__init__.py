@@ -3,19 +3,50 @@
 from __future__ import annotations
 
 from collections import OrderedDict
+from collections.abc import Mapping
+import functools
+import http.client
 import logging
 import re
-import json
+import sys
+import threading
 import time
 from datetime import datetime
+from types import MappingProxyType
 from voluptuous import Optional
 from yarl import URL
-import urllib.request
-import urllib.error
 
-from . import const
+from . import const, csvlog, jsondecode
+from .batch import WriteBatch, WriteResult
+from .exceptions import (
+    CircuitOpenError,
+    OekofenAPIException,
+    OekofenHTTPError,
+    ValueOutOfBoundaryError,
+)
+from .history import History, RingBuffer
+from .pellets import PelletEstimator
+from .retry import CircuitBreaker, RetryPolicy, get_circuit_breaker
+from .scheduler import PollScheduler
+from .store import LocalStore
+from .registry import SharedRegistry
+from .subscriptions import Subscription
+from .views import LazyAttributes, LazyData
 
 _LOGGER = logging.getLogger(__name__)
+_MISSING = object()
+
+
+def _value2json_str(value):
+    """True -> "true", 250 -> "250", like the "val" strings of ``all?``"""
+    if isinstance(value, bool):
+        if value:
+            return const.JSON_VALUE_TRUE
+        return const.JSON_VALUE_FALSE
+    if isinstance(value, (int, float)):
+        return str(value)
+    return value
+
 
 class Oekofen(object):
     def __init__(
@@ -24,23 +55,105 @@ class Oekofen(object):
         json_password: str,
         port: int = const.DEFAULT_PORT,
         update_interval: int = const.UPDATE_INTERVAL_SECONDS,
+        incremental: bool = False,
+        schema_cache: bool = False,
+        schema_refresh_interval: int = const.SCHEMA_REFRESH_INTERVAL_SECONDS,
+        connect_timeout: float = const.CONNECT_TIMEOUT_SECONDS,
+        read_timeout: float = const.REQUEST_TIMEOUT_SECONDS,
+        domain_whitelist: list | None = None,
+        lazy_data: bool = False,
+        lazy_attributes: bool = False,
+        retry_policy: RetryPolicy | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
     ):
+        """
+        :param domain_whitelist: only fetch and parse these domains from their
+            own endpoints, i.e. ["pe1", "hk1", "system"]
+        :param lazy_data: self.data is a read-only LazyData mapping, values
+            are decoded on first access instead of on every refresh. Changed
+            Attribute objects are replaced by copies instead of patched in
+            place, get them again after a refresh or write.
+        :param lazy_attributes: implies lazy_data, Attribute objects are only
+            created from the raw json when they or their self.data keys are
+            accessed, once per refresh. Refreshes are always full builds.
+        :param retry_policy: default: one retry after RETRY_DELAY_SECONDS
+        :param circuit_breaker: default: one shared breaker per host and port,
+            while it is open update_data returns the last good data
+        """
         self.host = host
+        self.port = port
+        self.domain_whitelist = domain_whitelist
+        self.lazy_attributes = lazy_attributes
+        self.lazy_data = lazy_data or lazy_attributes
         self.update_interval = update_interval
+        self.incremental = incremental
+        self.schema_cache = schema_cache
+        self.schema_refresh_interval = schema_refresh_interval
+        self._schema = {}
+        self._last_schema_fetch = None
+        self._schema_changed = False
         self._raw_data = {}
         self._csv_data = OrderedDict()
+        self._csv_tail = csvlog.CsvLogTail()
         self.data = {}
         self._last_fetch = datetime.now()
         self._status = None
         self.domains = OrderedDict()
+        self._domains_by_key = OrderedDict()
+        self._attribute_index = {}
+        # keys changed by the last refresh, None after full builds without subscribers
+        self.changed_keys = []
+        self._subscriptions = []
+        self.history = None
+        self.pellet_estimator = None
+        self.store = None
         self.base_url = const.BASE_URL_TMPL.format(
             host=host, port=port, json_password=json_password
         )
+        self._url = URL(self.base_url)
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self._connection = None
+        self._connection_lock = threading.Lock()
+        self.connection_stats = {
+            'new': 0,
+            'reused': 0,
+            'reconnects': 0,
+        }
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.circuit_breaker = circuit_breaker or get_circuit_breaker(f"{host}:{port}")
+        self.retry_stats = {
+            'retries': 0,
+            'exhausted': 0,
+            'stale_served': 0,
+        }
+        # single-flight update_data, _data_lock guards swapping self.data
+        self._update_lock = threading.Lock()
+        self._data_lock = threading.RLock()
+        self._update_generation = 0
+        self.update_stats = {
+            'fetches': 0,
+            'coalesced': 0,
+        }
 
     def __repr__(self):
         cls_name = self.__class__.__name__
         return f"{cls_name}({self.host})"
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        """closes the persistent connection to the controller and self.store"""
+        with self._connection_lock:
+            self._close_connection()
+        if self.store is not None:
+            self.store.close()
+            self.store = None
+
     def update_data(self):
         """
         - fetches the raw json from oekofen
@@ -52,89 +165,510 @@ class Oekofen(object):
               "hk1.L_roomtemp_act_max":3276.7,
 
               dict-key = "<domain><domain_index>.<attribute>"
+
+        With ``incremental=True`` the Domain/Attribute objects of the first
+        build are kept and only their ``raw_value`` is patched, ``self.data``
+        is only written for keys whose value changed. Objects are only added
+        or removed if the domain or attribute set of the controller changes,
+        changed formats (see refresh_schema) trigger a full build.
+
+        With ``schema_cache=True`` the formats (unit, factor, min, max, format)
+        are fetched once via ``all?`` and refreshed every
+        ``schema_refresh_interval`` seconds or by ``refresh_schema()``, regular
+        polls use the values-only ``all`` endpoint.
+
+        Thread safe: concurrent calls share one fetch, callers waiting for
+        it get its result. self.data is never changed in place but swapped
+        for a new mapping, a reference to it stays consistent. Attribute
+        objects are not snapshots: without lazy_data incremental refreshes
+        and writes patch them in place.
         """
-        if not self._has_valid_data():
-            self._raw_data = self._fetch_data(
-                path=const.URL_PATH_ALL_WITH_FORMATS, is_json=True
-            )
+        if self._has_valid_data():
+            return None
+        generation = self._update_generation
+        with self._update_lock:
+            if self._update_generation != generation or self._has_valid_data():
+                # refreshed by another thread while waiting for the lock
+                self.update_stats['coalesced'] += 1
+                return self._get_update_result()
+            self.update_stats['fetches'] += 1
+            try:
+                self._raw_data = self._fetch_raw_data()
+            except CircuitOpenError as e:
+                return self._serve_last_data(e)
+            return self._apply_raw_data()
+
+    def _serve_last_data(self, error: CircuitOpenError):
+        """the last good data while the circuit breaker is open"""
+        if not self._raw_data:
+            raise error
+        self.retry_stats['stale_served'] += 1
+        _LOGGER.debug("[Oekofen.update_data] %s, serving the last data", error)
+        return self._get_update_result()
+
+    def get_retry_stats(self) -> dict:
+        return dict(self.retry_stats, circuit=self.circuit_breaker.get_stats())
+
+    def _apply_raw_data(self):
+        """parses self._raw_data, shared by the sync and async clients"""
+        with self._data_lock:
             self._last_fetch = datetime.now()
-            self.domains = OrderedDict()
 
-            metadata = {
-                'ip_host': self.host,
-                'installateur_code': self.get_installateur_code()
-            }
+            if not (
+                self.incremental
+                and not self.lazy_attributes
+                and not self._has_new_formats()
+                and self._refresh_data()
+            ):
+                self._build_data()
+            self._schema_changed = False
+            self._update_generation += 1
+
+            if self.history is not None:
+                self.history.record(self.data, keys=self._iter_attribute_keys())
+            if self.pellet_estimator is not None:
+                self.pellet_estimator.feed_data(self.data)
+            if self.store is not None:
+                self.store.add_data(self.data, keys=self._iter_attribute_keys())
+            if self._subscriptions and self.changed_keys is not None:
+                self._notify_subscribers(self.changed_keys)
+
+            return self._get_update_result()
+
+    def _get_update_result(self):
+        data = self.data
+        if isinstance(data, Mapping) and (
+            "system.system_info" in data or self.domain_whitelist
+        ):
+            #_LOGGER.debug("update_data=%s", data)
+            return data
+
+    def enable_history(
+        self, capacity: int = const.HISTORY_CAPACITY, patterns=None
+    ) -> History:
+        """
+        Records the numeric attribute values of every refresh into
+        self.history, `capacity` samples per key. The constant _min/_max,
+        _choice, meta and index entries of self.data are not recorded.
 
-            self.data = {
-                "system_indexes": [""],  # empty domain
-                "weather_indexes": [""],  # empty domain
-                "forecast_indexes": [""],  # empty domain
-                "error_indexes": [""],  # empty domain
-                "meta_indexes": [""],  # empty domain, injected
-                "hk_indexes": [],
-                "pu_indexes": [],
-                "ww_indexes": [],
-                "circ_indexes": [],
-                "pe_indexes": [],
-                "sk_indexes": [],
-            }
+        :param patterns: keys or glob patterns to record, all numeric
+            attribute values if None
+        """
+        if self.history is None:
+            self.history = History(capacity=capacity, patterns=patterns)
+        return self.history
 
-            _LOGGER.debug("[oekfoen_api.update_data] init_data=%s", self.data)
+    def disable_history(self):
+        self.history = None
 
-            # Domain part
-            for domain_with_index, attributes_dict in self._raw_data.items():
-                index_nrs = re.findall(const.RE_FIND_NUMBERS, domain_with_index)
-                if index_nrs:
-                    index_nr = int(index_nrs[0])
+    def enable_pellet_estimator(self, **kwargs) -> PelletEstimator:
+        """
+        Feeds every refresh into self.pellet_estimator, see PelletEstimator
+        for the kwargs. /log rows can be fed with feed_csv_rows.
+        """
+        if self.pellet_estimator is None:
+            self.pellet_estimator = PelletEstimator(**kwargs)
+        return self.pellet_estimator
+
+    def enable_store(self, path: str) -> LocalStore:
+        """
+        Stores the attribute values of every refresh and the rows returned
+        by update_csv_tail in self.store (SQLite file `path`)
+        """
+        if self.store is None:
+            self.store = LocalStore(path)
+        return self.store
+
+    def subscribe(self, patterns, callback, deadband: float | None = None) -> Subscription:
+        """
+        Calls `callback` after each refresh with the changed keys matching
+        `patterns` as one list of (key, old, new):
+
+            client.subscribe(["pe1.*", "*.L_statetext"], print, deadband=0.5)
+
+        Only the keys changed by the refresh are diffed (self.changed_keys),
+        that needs ``incremental=True``: a full build compares all keys of
+        self.data, with lazy_data every subscribed key is decoded and
+        compared on each refresh.
+        """
+        subscription = Subscription(patterns, callback, deadband=deadband)
+        subscription.seed(self.data)
+        self._subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        if subscription in self._subscriptions:
+            self._subscriptions.remove(subscription)
+
+    def _notify_subscribers(self, changed_keys: list):
+        for subscription in list(self._subscriptions):
+            changes = subscription.diff(changed_keys, self.data)
+            if not changes:
+                continue
+            try:
+                subscription.callback(changes)
+            except Exception:
+                _LOGGER.exception(
+                    "[Oekofen._notify_subscribers] callback of %s failed", subscription
+                )
+
+    def _fetch_raw_data(self) -> dict:
+        if not self.schema_cache:
+            return self._fetch_documents(with_formats=True)
+        if self._schema_is_outdated():
+            return self.refresh_schema()
+        values = self._fetch_documents(with_formats=False)
+        raw_data = self._merge_with_schema(self._schema, values)
+        if raw_data is None:
+            _LOGGER.info("[Oekofen._fetch_raw_data] unknown keys, refreshing schema")
+            return self.refresh_schema()
+        return raw_data
+
+    def refresh_schema(self) -> dict:
+        """
+        Fetches the formats (``all?``) used to interpret the values-only polls
+
+        :return: the fetched raw json
+        """
+        return self._set_schema(self._fetch_documents(with_formats=True))
+
+    def _fetch_documents(self, with_formats: bool) -> dict:
+        return self._merge_documents(
+            [
+                self._fetch_data(path=path, is_json=True)
+                for path in self._get_document_paths(with_formats)
+            ]
+        )
+
+    def _get_document_paths(self, with_formats: bool) -> list:
+        """``all?``/``all`` or one path per whitelisted domain (``pe1?``/``pe1``)"""
+        if not self.domain_whitelist:
+            if with_formats:
+                return [const.URL_PATH_ALL_WITH_FORMATS]
+            return [const.URL_PATH_ALL_VALUES]
+        if with_formats:
+            return [f"{d}{const.URL_FORMATS_SUFFIX}" for d in self.domain_whitelist]
+        return list(self.domain_whitelist)
+
+    def _merge_documents(self, documents: list) -> dict:
+        if not self.domain_whitelist:
+            return documents[0]
+        raw_data = OrderedDict()
+        for domain_with_index, document in zip(self.domain_whitelist, documents):
+            if domain_with_index in document:
+                raw_data[domain_with_index] = document[domain_with_index]
+            else:
+                # plain attributes without the domain key
+                raw_data[domain_with_index] = document
+        return raw_data
+
+    def _set_schema(self, schema: dict) -> dict:
+        self._schema = schema
+        self._schema_changed = True
+        self._last_schema_fetch = datetime.now()
+        return self._schema
+
+    def _schema_is_outdated(self) -> bool:
+        if not self._schema or self._last_schema_fetch is None:
+            return True
+        return (
+            datetime.now() - self._last_schema_fetch
+        ).total_seconds() >= self.schema_refresh_interval
+
+    @staticmethod
+    def _merge_with_schema(schema: dict, values: dict) -> dict | None:
+        """
+        Merges the values-only json (``all``) into the cached ``all?`` schema
+
+            {"hk1": {"temp_heat": 250}}
+            -> {"hk1": {"temp_heat": {"val": "250", "unit": "?C", "factor": "0.1", ...}}}
+
+        :return: None if `values` contains keys unknown to the schema
+        """
+        raw_data = OrderedDict()
+        for domain_with_index, attributes_dict in values.items():
+            domain_schema = schema.get(domain_with_index)
+            if domain_schema is None:
+                return None
+            domain_data = OrderedDict()
+            for att_key, att_value in attributes_dict.items():
+                att_schema = domain_schema.get(att_key, _MISSING)
+                if att_schema is _MISSING:
+                    return None
+                if isinstance(att_schema, dict):
+                    # values come as json types, the schema has strings
+                    att_data = dict(att_schema)
+                    att_data[const.JSON_KEY_VALUE] = _value2json_str(att_value)
+                    domain_data[att_key] = att_data
                 else:
-                    index_nr = None
-                domain_name = domain_with_index.replace(str(index_nr), "")
+                    domain_data[att_key] = att_value
+            raw_data[domain_with_index] = domain_data
+        return raw_data
+
+    def _build_data(self):
+        """
+        (Re)builds self.domains and self.data from self._raw_data
+
+        In incremental mode already known Domain objects are reused.
+        """
+        old_data = self.data
+        if self.incremental and not self.lazy_attributes:
+            known_domains = self._domains_by_key
+        else:
+            known_domains = {}
+        domains_by_key = OrderedDict()
+        domains = OrderedDict()
+
+        if self.lazy_data:
+            data = LazyData()
+            set_value = data.set_value
+        else:
+            data = {}
+            set_value = data.__setitem__
+        for k, v in self._get_default_indexes().items():
+            set_value(k, v)
+
+        _LOGGER.debug("[oekfoen_api.update_data] init_data=%s", data)
+
+        # Domain part
+        for domain_with_index, attributes_dict in self._raw_data.items():
+            index_nrs = re.findall(const.RE_FIND_NUMBERS, domain_with_index)
+            if index_nrs:
+                index_nr = int(index_nrs[0])
+            else:
+                index_nr = None
+            domain_name = domain_with_index.replace(str(index_nr), "")
+            domain = known_domains.get(domain_with_index)
+            if domain is None:
                 domain = Domain(oekofen=self, name=domain_name, index=index_nr)
-                if domain_name in self.domains:
-                    self.domains[domain_name].append(domain)
+            domains_by_key[domain_with_index] = domain
+            if domain_name in domains:
+                domains[domain_name].append(domain)
+            else:
+                domains[domain_name] = [domain]
+
+            if index_nr is not None:
+                if f"{domain_name}_indexes" not in data:
+                    set_value(f"{domain_name}_indexes", [])
+                data[f"{domain_name}_indexes"].append(index_nr)
+
+            # Attribute part
+            if self.lazy_attributes:
+                domain.set_raw_attributes(attributes_dict)
+                for att_key, raw in attributes_dict.items():
+                    for key, getter in self._get_raw_attribute_getters(
+                        domain_with_index, att_key, raw
+                    ):
+                        data.set_getter(key, getter, (domain.attributes, att_key))
+                continue
+            # reused domains: published LazyData snapshots keep the old objects
+            domain.update_attributes(
+                data=attributes_dict, copy_on_write=self.lazy_data, with_schema=True
+            )
+
+            # data-Part
+            for att_instance in domain.attributes.values():
+                if self.lazy_data:
+                    for key, getter in self._get_attribute_getters(
+                        domain_with_index, att_instance
+                    ):
+                        data.set_getter(key, getter, att_instance)
+                else:
+                    for key, value in self._get_attribute_data(
+                        domain_with_index, att_instance
+                    ):
+                        data[key] = value
+
+        # injecting metadata Part
+        for k, v in self._get_metadata().items():
+            set_value(f"meta.{k}", v)
+
+        self._domains_by_key = domains_by_key
+        self.domains = domains
+        if self.lazy_attributes:
+            # see _lookup_attribute
+            self._attribute_index = {}
+        else:
+            self._rebuild_attribute_index()
+        self.data = data
+        if not self._subscriptions:
+            # only read by the subscriptions, not worth a diff of all keys
+            self.changed_keys = None
+            return
+        if self.lazy_data:
+            # diffing would decode everything, all keys are candidates
+            self.changed_keys = list(data)
+        else:
+            self.changed_keys = [
+                k for k, v in data.items() if old_data.get(k, _MISSING) != v
+            ]
+        self.changed_keys.extend(k for k in old_data if k not in data)
+
+    def _get_default_indexes(self) -> dict:
+        indexes = {
+            "system_indexes": [""],  # empty domain
+            "weather_indexes": [""],  # empty domain
+            "forecast_indexes": [""],  # empty domain
+            "error_indexes": [""],  # empty domain
+            "meta_indexes": [""],  # empty domain, injected
+            "hk_indexes": [],
+            "pu_indexes": [],
+            "ww_indexes": [],
+            "circ_indexes": [],
+            "pe_indexes": [],
+            "sk_indexes": [],
+        }
+        if self.domain_whitelist:
+            whitelisted_names = {"meta"}
+            for domain_with_index in self.domain_whitelist:
+                whitelisted_names.add(
+                    re.sub(const.RE_FIND_NUMBERS, "", domain_with_index)
+                )
+            indexes = {
+                k: v
+                for k, v in indexes.items()
+                if k[: -len("_indexes")] in whitelisted_names
+            }
+        return indexes
+
+    def _has_new_formats(self) -> bool:
+        """
+        True if self._raw_data was merged with a newly fetched schema, or
+        (without schema_cache) carries other formats than the attributes
+        """
+        if self.schema_cache:
+            return self._schema_changed
+        for domain_with_index, attributes_dict in self._raw_data.items():
+            domain = self._domains_by_key.get(domain_with_index)
+            if domain is None:
+                continue
+            attributes = domain.attributes
+            for att_key, raw in attributes_dict.items():
+                att = attributes.get(att_key)
+                if (
+                    att is not None
+                    and isinstance(raw, dict)
+                    and att.schema.key != AttributeSchema.get_key(raw)
+                ):
+                    return True
+        return False
+
+    def _refresh_data(self) -> bool:
+        """
+        Patches the known Domain/Attribute objects with self._raw_data
+
+        Returns False without touching anything if the domain or attribute
+        set of the controller changed, a full build is needed then.
+        """
+        if self._raw_data.keys() != self._domains_by_key.keys():
+            return False
+        for domain_with_index, attributes_dict in self._raw_data.items():
+            domain = self._domains_by_key[domain_with_index]
+            if attributes_dict.keys() != domain.attributes.keys():
+                return False
+
+        data = self.data.copy()
+        changed_keys = []
+        for domain_with_index, attributes_dict in self._raw_data.items():
+            domain = self._domains_by_key[domain_with_index]
+            # the LazyData snapshots decode from the Attribute objects
+            for att_key in domain.update_attributes(
+                data=attributes_dict, copy_on_write=self.lazy_data
+            ):
+                att = domain.attributes[att_key]
+                if self.lazy_data:
+                    self._index_attribute(att)
+                changed_keys.extend(
+                    self._update_attribute_data(data, domain_with_index, att)
+                )
+
+        for k, v in self._get_metadata().items():
+            key = f"meta.{k}"
+            if data.get(key, _MISSING) != v:
+                if isinstance(data, LazyData):
+                    data.set_value(key, v)
                 else:
-                    self.domains[domain_name] = [domain]
-
-                if index_nr is not None:
-                    self.data.setdefault(f"{domain_name}_indexes", [])
-                    self.data[f"{domain_name}_indexes"].append(index_nr)
-
-                # Attribute part
-                domain.update_attributes(data=attributes_dict)
-
-                # data-Part
-                for att_key, att_value in attributes_dict.items():
-                    if index_nr is None:
-                        index_nr = 1
-                    att_rendered_value = self._get_value(
-                        domain=domain_name, attribute=att_key, domain_index=index_nr
-                    )
-                    self.data[f"{domain_with_index}.{att_key}"] = att_rendered_value
-                    # special
-                    att_instance = self.get_attribute(domain_name, att_key, index_nr)
-                    if att_instance.choices is not None:
-                        self.data[
-                            f"{domain_with_index}.{att_key}_choice"
-                        ] = att_instance.get_choice()
-                    if att_instance.min is not None:
-                        self.data[
-                            f"{domain_with_index}.{att_key}_min"
-                        ] = att_instance.get_min_value()
-                    if att_instance.max is not None:
-                        self.data[
-                            f"{domain_with_index}.{att_key}_max"
-                        ] = att_instance.get_max_value()
-
-            # injecting metadata Part
-            for k, v in metadata.items():
-                self.data[f'meta.{k}'] = v
-
-            if isinstance(self.data, dict) and "system.system_info" in self.data:
-                #_LOGGER.debug("update_data=%s", self.data)
-                return self.data
+                    data[key] = v
+                changed_keys.append(key)
+        self.data = data
+        self.changed_keys = changed_keys
+        return True
+
+    def _update_attribute_data(
+        self, data: Mapping, domain_with_index: str, att: Attribute
+    ) -> list:
+        """
+        Updates the entries of a changed attribute in `data` (a copy of
+        self.data)
+
+        :return: the changed keys, for LazyData all keys of the attribute
+        """
+        if isinstance(data, LazyData):
+            keys = []
+            for key, getter in self._get_attribute_getters(domain_with_index, att):
+                data.set_getter(key, getter, att)
+                keys.append(key)
+            return keys
+        changed_keys = []
+        for key, value in self._get_attribute_data(domain_with_index, att):
+            if data.get(key, _MISSING) != value:
+                data[key] = value
+                changed_keys.append(key)
+        return changed_keys
+
+    @staticmethod
+    def _get_attribute_getters(domain_with_index: str, att: Attribute):
+        """yields the flattened self.data keys of one attribute and their getter"""
+        key = f"{domain_with_index}.{att.key}"
+        yield key, Attribute.get_value
+        # special
+        if att.choices is not None:
+            yield f"{key}_choice", Attribute.get_choice
+        if att.min is not None:
+            yield f"{key}_min", Attribute.get_min_value
+        if att.max is not None:
+            yield f"{key}_max", Attribute.get_max_value
+
+    @staticmethod
+    def _get_raw_attribute_getters(domain_with_index: str, att_key: str, raw):
+        """
+        Same keys as _get_attribute_getters, but from the raw json of the
+        attribute, the getters take (LazyAttributes, att_key)
+        """
+        key = f"{domain_with_index}.{att_key}"
+        yield key, _get_lazy_value
+        if isinstance(raw, dict):
+            if raw.get(const.JSON_KEY_FORMAT):
+                yield f"{key}_choice", _get_lazy_choice
+            if raw.get(const.JSON_KEY_MINIMUM) is not None:
+                yield f"{key}_min", _get_lazy_min_value
+            if raw.get(const.JSON_KEY_MAXIMUM) is not None:
+                yield f"{key}_max", _get_lazy_max_value
+
+    def _iter_attribute_keys(self):
+        """yields "hk1.temp_heat" of all attributes, without creating them"""
+        for domain_with_index, domain in self._domains_by_key.items():
+            for att_key in domain.attributes:
+                yield f"{domain_with_index}.{att_key}"
+
+    @classmethod
+    def _get_attribute_data(cls, domain_with_index: str, att: Attribute):
+        """yields the flattened self.data items of one attribute"""
+        for key, getter in cls._get_attribute_getters(domain_with_index, att):
+            yield key, getter(att)
+
+    def _get_metadata(self) -> dict:
+        return {
+            'ip_host': self.host,
+            'installateur_code': self.get_installateur_code()
+        }
 
     def get_version(self):
         text_data = self._fetch_data("??", is_json=False, is_text=True)
+        return self._parse_version(text_data)
+
+    @staticmethod
+    def _parse_version(text_data: str):
         first_line = text_data.split("\n")[0].split(const.VERSION_SEPERATOR)
         # "['Oekofen JSON Interface', 'V4.00b', 'http://www.oekofen.at']"
         if len(first_line) == 3:
@@ -142,77 +676,217 @@ class Oekofen(object):
 
     def update_csv_data(self):
         # URL http://192.168.178.222:4321/eMlG/log
-        self._csv_data = OrderedDict()
         csv_data = self._fetch_data("log", is_json=False, is_text=True)
-        csv_lines = csv_data.split("\r\n")
-        cnt_csv_lines = len(csv_lines)
-        first_line_splitted = csv_lines[0].split(";")
-        last_line_splitted = csv_lines[cnt_csv_lines - 2].split(";")
-
-        dt_day = datetime.now().replace(microsecond=0)
-
-        _LOGGER.info("[Oekofen.update_csv_data] len(first_line_splitted)=%d", len(first_line_splitted))
-        _LOGGER.info("[Oekofen.update_csv_data] len(last_line_splitted)=%d", len(last_line_splitted))
-
-        for col, content in enumerate(first_line_splitted):
-            content = content.replace("[»C]", "[°C]")
-            raw_value = last_line_splitted[col]
-            _LOGGER.debug("- %s %s %s", col, content, raw_value)
-            if "," in raw_value:
-                value = float(raw_value.replace(",", "."))
-            elif "." in raw_value and len(raw_value.split(".")) == 3:
-                day = int(raw_value.split(".")[0])
-                month = int(raw_value.split(".")[1])
-                year = int(raw_value.split(".")[2])
-                dt_day = dt_day.replace(year=year, month=month, day=day)
-                value = dt_day.date()
-            elif ":" in raw_value and len(raw_value.split(":")) == 3:
-                t_hour = int(raw_value.split(":")[0])
-                t_min = int(raw_value.split(":")[1])
-                t_sec = int(raw_value.split(":")[2])
-                dt_day = dt_day.replace(hour=t_hour, minute=t_min, second=t_sec)
-                value = dt_day.time()
-                self._csv_data["timestamp"] = dt_day
-            elif raw_value.isdigit():
-                value = int(raw_value)
-            else:
-                value = raw_value
+        return self._parse_csv_data(csv_data)
 
-            content = content.rstrip()
-            if len(content):
-                self._csv_data[content] = value
+    def _parse_csv_data(self, csv_data: str):
+        csv_lines = csv_data.split(const.CSV_LINE_SEPARATOR)
+        cnt_csv_lines = len(csv_lines)
+        schema = csvlog.CsvLogSchema.from_header(csv_lines[0])
+        _LOGGER.info("[Oekofen.update_csv_data] %s", schema)
+        self._csv_data = schema.parse_row(csv_lines[cnt_csv_lines - 2])
         return self._csv_data
 
+    def iter_csv_log(self):
+        """
+        Yields every row of the csv log as OrderedDict (like update_csv_data),
+        the log is streamed, memory stays flat no matter how long it is
+        """
+        return csvlog.iter_csv_rows(self._iter_lines("log"))
+
+    def get_csv_columns(self) -> OrderedDict:
+        """
+        The whole csv log as one typed NumPy array per column, needs numpy,
+        see columnar.load_csv_columns()
+        """
+        from . import columnar
+
+        return columnar.load_csv_columns(self._iter_lines("log"))
+
+    def update_csv_tail(self, force: bool = False) -> list:
+        """
+        Returns only the csv log rows newer than the last call and sets
+        self._csv_data to the newest row. Like update_data, the log is only
+        requested again after `update_interval` seconds (or with `force`).
+
+        After the first call only the appended bytes are requested (http
+        Range), a rotated or truncated log is detected and resynced. The
+        first call returns the newest row only, use iter_csv_log() for the
+        history.
+        """
+        if self._csv_tail_is_fresh(force):
+            return []
+
+        tail = self._csv_tail
+        rows = None
+        range_start = tail.get_range_start()
+        if range_start:
+            resp, raw_data = self._request(
+                "log", headers={"Range": f"bytes={range_start}-"}
+            )
+            if resp.status == 206:
+                rows = tail.feed(raw_data, offset=range_start)
+            elif resp.status == 200:
+                # Range not supported
+                rows = tail.feed(raw_data)
+        if rows is None:
+            _LOGGER.info("[Oekofen.update_csv_tail] (re)syncing csv log, %s", tail)
+            resp, raw_data = self._request("log")
+            if resp.status != 200:
+                raise OekofenHTTPError(
+                    f"{self.base_url}log", resp.status, resp.reason, resp.msg
+                )
+            rows = tail.feed(raw_data)
+        return self._apply_csv_tail(rows)
+
+    def _csv_tail_is_fresh(self, force: bool) -> bool:
+        last_fetch = self._csv_tail.last_fetch
+        return (
+            not force
+            and last_fetch is not None
+            and (datetime.now() - last_fetch).total_seconds() < self.update_interval
+        )
+
+    def _apply_csv_tail(self, rows: list) -> list:
+        self._csv_tail.last_fetch = datetime.now()
+        if rows:
+            self._csv_data = rows[-1]
+            if self.store is not None:
+                self.store.add_csv_rows(rows)
+        return rows
+
+    def _iter_lines(self, path: str):
+        """
+        Streams the decoded lines of `path` on a dedicated connection, the
+        persistent connection stays free for other requests meanwhile
+        """
+        raw_url = f"{self.base_url}{path}"
+        _LOGGER.info("[Oekofen._iter_lines] url=%s", raw_url)
+        conn = http.client.HTTPConnection(
+            self._url.host, self._url.port, timeout=self.connect_timeout
+        )
+        try:
+            conn.connect()
+            conn.sock.settimeout(self.read_timeout)
+            conn.request("GET", f"{self._url.raw_path}{path}")
+            resp = conn.getresponse()
+            if resp.status >= 400:
+                raise OekofenHTTPError(raw_url, resp.status, resp.reason, resp.msg)
+            for raw_line in resp:
+                yield raw_line.decode(const.CHARSET).rstrip(const.CSV_LINE_SEPARATOR)
+        finally:
+            conn.close()
+
     def _fetch_data(
         self, path, is_json=True, is_text=False, retry=True
     ) -> Optional(dict):
-        raw_url = f"{self.base_url}{path}"
-        _LOGGER.info("[Oekofen._fetch_data] using urllib.request.urlopen url=%s", raw_url)
+        """
+        Retries the errors classified as retryable by self.retry_policy,
+        raises CircuitOpenError without a request while the circuit breaker
+        of the controller is open
+        """
+        breaker = self.circuit_breaker
+        if not breaker.allow():
+            raise CircuitOpenError(f"{self.host}:{self.port} is failing, {breaker}")
+        # the outcome must reach the breaker, a pending probe blocks all others
+        recorded = False
         try:
-            resp = urllib.request.urlopen(raw_url)
-            raw_data = resp.read()
-            encoding = resp.info().get_content_charset(const.CHARSET)
-            if resp.status == 200:
-                if is_json:
-                    json_data = json.loads(raw_data.decode(encoding))
-                    if json_data is not None:
-                        return json_data
-                    return None
-                if is_text:
-                    return raw_data.decode(const.CHARSET)
-                return True
-        except urllib.error.HTTPError:
-            if retry:
-                time.sleep(2.5)
-                data = self._fetch_data(
-                    path=path, is_json=is_json, is_text=is_text, retry=False
-                )
-                return data
-            else:
-                raise
-        except Exception as e:
-            _LOGGER.error(e)
-            raise
+            attempts = self.retry_policy.retries + 1 if retry else 1
+            for attempt in range(attempts):
+                try:
+                    data = self._fetch_data_once(path, is_json=is_json, is_text=is_text)
+                except Exception as e:
+                    if not self.retry_policy.is_retryable(e):
+                        # the controller answered
+                        recorded = True
+                        breaker.record_success()
+                        _LOGGER.error(e)
+                        raise
+                    if attempt + 1 >= attempts:
+                        self.retry_stats['exhausted'] += 1
+                        recorded = True
+                        breaker.record_failure(e)
+                        _LOGGER.error(e)
+                        raise
+                    delay = self.retry_policy.get_delay(attempt)
+                    self.retry_stats['retries'] += 1
+                    _LOGGER.info("[Oekofen._fetch_data] %r, retrying in %.1fs", e, delay)
+                    time.sleep(delay)
+                else:
+                    recorded = True
+                    breaker.record_success()
+                    return data
+        finally:
+            if not recorded:
+                breaker.record_aborted()
+
+    def _fetch_data_once(self, path, is_json=True, is_text=False) -> Optional(dict):
+        raw_url = f"{self.base_url}{path}"
+        _LOGGER.info("[Oekofen._fetch_data] url=%s", raw_url)
+        resp, raw_data = self._request(path)
+        if resp.status >= 400:
+            raise OekofenHTTPError(raw_url, resp.status, resp.reason, resp.msg)
+        encoding = resp.msg.get_content_charset(const.CHARSET)
+        if resp.status == 200:
+            if is_json:
+                json_data = jsondecode.loads(raw_data, encoding)
+                if json_data is not None:
+                    return json_data
+                return None
+            if is_text:
+                return raw_data.decode(const.CHARSET)
+            return True
+
+    def _request(self, path: str, headers: dict | None = None) -> tuple:
+        """
+        GET on the persistent keep-alive connection, a connection reset by
+        the controller is answered with one transparent reconnect
+
+        :return: (http.client.HTTPResponse, body)
+        """
+        url_path = f"{self._url.raw_path}{path}"
+        with self._connection_lock:
+            for attempt in range(2):
+                conn, reused = self._get_connection()
+                try:
+                    conn.request("GET", url_path, headers=headers or {})
+                    resp = conn.getresponse()
+                    raw_data = resp.read()
+                except TimeoutError:
+                    self._close_connection()
+                    raise
+                except (OSError, http.client.BadStatusLine):
+                    # i.e. a kept alive connection closed by the controller
+                    self._close_connection()
+                    if reused and attempt == 0:
+                        self.connection_stats['reconnects'] += 1
+                        continue
+                    raise
+                except Exception:
+                    self._close_connection()
+                    raise
+                if resp.will_close:
+                    self._close_connection()
+                return resp, raw_data
+
+    def _get_connection(self) -> tuple:
+        """:return: (http.client.HTTPConnection, reused)"""
+        if self._connection is not None:
+            self.connection_stats['reused'] += 1
+            return self._connection, True
+        conn = http.client.HTTPConnection(
+            self._url.host, self._url.port, timeout=self.connect_timeout
+        )
+        conn.connect()
+        conn.sock.settimeout(self.read_timeout)
+        self.connection_stats['new'] += 1
+        self._connection = conn
+        return conn, False
+
+    def _close_connection(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
 
     def _has_valid_data(self):
         data_is_old = (
@@ -227,16 +901,11 @@ class Oekofen(object):
     ):
         if domain_index < 1:
             return None
-        if not self.domains:
-            return None
-        domains = self.domains.get(domain, [])
-        if len(domains) > (domain_index - 1):
-            domain_instance = domains[domain_index - 1]
-            attribute_instance = domain_instance.attributes.get(attribute, None)
-            if attribute_instance is not None:
-                if return_attribute:
-                    return attribute_instance
-                return attribute_instance.get_value()
+        attribute_instance = self._lookup_attribute((domain, domain_index, attribute))
+        if attribute_instance is not None:
+            if return_attribute:
+                return attribute_instance
+            return attribute_instance.get_value()
         return None
 
     def get_attribute(
@@ -249,6 +918,68 @@ class Oekofen(object):
             return_attribute=True,
         )
 
+    def get_attributes(self, keys: list) -> OrderedDict:
+        """
+        Bulk lookup of attributes
+
+        :param keys: "hk1.temp_heat" or ("hk", 1, "temp_heat") keys
+        :return: OrderedDict key -> Attribute (None for unknown keys)
+        """
+        return OrderedDict((key, self._lookup_attribute(key)) for key in keys)
+
+    def _lookup_attribute(self, key) -> Attribute | None:
+        """:param key: "hk1.temp_heat" or ("hk", 1, "temp_heat")"""
+        if not self.lazy_attributes:
+            return self._attribute_index.get(key, None)
+        # no index, the attribute is created on access
+        if isinstance(key, tuple):
+            domain_name, position, att_key = key
+            domains = self.domains.get(domain_name, ())
+            if not 1 <= position <= len(domains):
+                return None
+            domain = domains[position - 1]
+        else:
+            domain_with_index, _, att_key = key.partition(".")
+            domain = self._domains_by_key.get(domain_with_index)
+            if domain is None:
+                return None
+        return domain.attributes.get(att_key, None)
+
+    def _rebuild_attribute_index(self):
+        """
+        Maps "hk1.temp_heat" and ("hk", 1, "temp_heat") to the Attribute, the
+        tuple index is the position in self.domains[name] like in _get_value
+        """
+        index = {}
+        for domain_name, domains in self.domains.items():
+            for position, domain in enumerate(domains, start=1):
+                domain_with_index = domain.get_name_with_index()
+                for att_key, att in domain.attributes.items():
+                    index[f"{domain_with_index}.{att_key}"] = att
+                    index[(domain_name, position, att_key)] = att
+        self._attribute_index = index
+
+    def _index_attribute(self, att: Attribute):
+        """(re)places one Attribute in the index, see _rebuild_attribute_index"""
+        domain = att.domain
+        position = self.domains[domain.name].index(domain) + 1
+        self._attribute_index[f"{domain.get_name_with_index()}.{att.key}"] = att
+        self._attribute_index[(domain.name, position, att.key)] = att
+
+    def _copy_attribute(self, att: Attribute) -> Attribute:
+        """
+        lazy_data mode: a copy of the current version of `att` replaces it in
+        its domain and the index, the published snapshots keep the original
+        """
+        domain = att.domain
+        new_att = domain.attributes.get(att.key, att).copy()
+        if self.lazy_attributes:
+            domain.attributes = domain.attributes.replace(att.key, new_att)
+        else:
+            domain.attributes[att.key] = new_att
+            self._index_attribute(new_att)
+        return new_att
+
     def _send_set_value(self, domain_attribute: str, value: str):
         """
 
@@ -256,21 +987,167 @@ class Oekofen(object):
         :param value: "0"
         :return:
         """
-        path = URL().with_name(f"{domain_attribute}={value}")
-        self._fetch_data(path=str(path), is_json=False)
+        self._fetch_data(
+            path=self._get_set_value_path(domain_attribute, value), is_json=False
+        )
+
+    @staticmethod
+    def _get_set_value_path(domain_attribute: str, value) -> str:
+        return str(URL().with_name(f"{domain_attribute}={value}"))
 
-    def set_attribute_value(self, att: Attribute, value):
+    def set_attribute_value(self, att: Attribute, value, verify: bool = False):
+        """
+        Sends the value and writes it through to the attribute and self.data,
+        with `verify` the attribute is read back from the controller (values
+        of its domain only)
+        """
         if not isinstance(att, ControllableAttribute):
             return False
-        val = att.generate_new_value(value=value, value_in_human_format=True)
-        if att.domain.index is None:
-            dom_att = f"{att.domain.name}.{att.key}"
-        else:
-            dom_att = f"{att.domain.name}{att.domain.index}.{att.key}"
-
+        dom_att, val = self._prepare_set_value(att, value)
         self._send_set_value(domain_attribute=dom_att, value=val)
+        read_back = self._read_back(att) if verify else _MISSING
+        if not self._write_through(att, val, read_back):
+            raise OekofenAPIException(f"{dom_att}={val} not confirmed by the controller")
+        return value
+
+    def _read_back(self, att: Attribute):
+        domain_with_index = att.domain.get_name_with_index()
+        document = self._fetch_data(path=domain_with_index, is_json=True)
+        return self._get_read_back_value(document, domain_with_index, att.key)
+
+    @staticmethod
+    def _get_read_back_value(document: dict, domain_with_index: str, att_key: str):
+        value = document.get(domain_with_index, document).get(att_key, None)
+        if isinstance(value, dict):
+            value = value.get(const.JSON_KEY_VALUE, None)
         return value
 
+    def _write_through(self, att: Attribute, val, read_back=_MISSING) -> bool:
+        """
+        Applies a sent value to att.raw_value and its self.data entries,
+        if given the read back value of the controller wins
+
+        The request was sent already, a value that does not convert to the
+        type of the attribute is skipped with a warning instead of raising,
+        the next refresh reads it from the controller.
+
+        :return: False if `read_back` differs from the sent value
+        """
+        with self._data_lock:
+            if self.lazy_data:
+                att = self._copy_attribute(att)
+            confirmed = True
+            sent_raw_value = _MISSING
+            if self._apply_written_value(att, val):
+                sent_raw_value = att.raw_value
+            if read_back is not _MISSING and self._apply_written_value(att, read_back):
+                confirmed = sent_raw_value is _MISSING or att.raw_value == sent_raw_value
+
+            data = self.data.copy()
+            changed_keys = self._update_attribute_data(
+                data, att.domain.get_name_with_index(), att
+            )
+            self.data = data
+            if changed_keys and self._subscriptions:
+                self._notify_subscribers(changed_keys)
+        return confirmed
+
+    @staticmethod
+    def _apply_written_value(att: Attribute, value) -> bool:
+        """att.update_value, False (att unchanged) if `value` does not convert"""
+        raw_value = _value2json_str(value)
+        try:
+            # on a copy first, a failed conversion leaves att half patched
+            att.copy().update_value(raw_value)
+        except ValueError:
+            _LOGGER.warning(
+                "[Oekofen._apply_written_value] %s.%s=%r does not convert, not written through",
+                att.domain.get_name_with_index(),
+                att.key,
+                value,
+            )
+            return False
+        att.update_value(raw_value)
+        return True
+
+    @staticmethod
+    def _prepare_set_value(att: ControllableAttribute, value) -> tuple:
+        """validates `value`, returns ("hk1.temp_heat", <raw value>)"""
+        val = att.generate_new_value(value=value, value_in_human_format=True)
+        if isinstance(val, float) and val.is_integer() and isinstance(att.raw_value, int):
+            # i.e. 1.0 for mode_auto, sent as "1" like the controller reports it
+            val = int(val)
+        dom_att = f"{att.domain.get_name_with_index()}.{att.key}"
+        return dom_att, val
+
+    def set_many(self, values, verify: bool = False) -> OrderedDict:
+        """
+        Validates all writes first, repeated writes to the same key are
+        collapsed (the last one wins), then sends them. The controller takes
+        one key=value per request, so one request per distinct key is sent,
+        all on the persistent connection.
+
+        :param values: {key: value} or [(key, value), ...], key is an
+            Attribute, "hk1.temp_heat" or ("hk", 1, "temp_heat")
+        :param verify: read back every written attribute, see set_attribute_value
+        :return: OrderedDict "hk1.temp_heat" -> WriteResult
+        """
+        results, writes = self._prepare_writes(values)
+        for dom_att, (att, value, val) in writes.items():
+            try:
+                self._send_set_value(domain_attribute=dom_att, value=val)
+                read_back = self._read_back(att) if verify else _MISSING
+            except Exception as e:
+                results[dom_att] = WriteResult(dom_att, value, val, False, e)
+                continue
+            results[dom_att] = self._get_write_result(dom_att, att, value, val, read_back)
+        return results
+
+    def _get_write_result(self, dom_att, att, value, val, read_back) -> WriteResult:
+        if self._write_through(att, val, read_back):
+            return WriteResult(dom_att, value, val, True, None)
+        error = OekofenAPIException(f"{dom_att}={val} not confirmed by the controller")
+        return WriteResult(dom_att, value, val, False, error)
+
+    def write_batch(self) -> WriteBatch:
+        return WriteBatch(self)
+
+    def _prepare_writes(self, values) -> tuple:
+        """
+        :return: (results of the rejected writes,
+            OrderedDict "hk1.temp_heat" -> (att, value, raw value) to send)
+        """
+        if isinstance(values, dict):
+            values = values.items()
+        collapsed = OrderedDict()
+        for key, value in values:
+            if isinstance(key, Attribute):
+                att = key
+            else:
+                att = self._lookup_attribute(key)
+            if att is not None:
+                key = f"{att.domain.get_name_with_index()}.{att.key}"
+            elif isinstance(key, tuple):
+                key = "{}{}.{}".format(*key)
+            collapsed.pop(key, None)
+            collapsed[key] = (att, value)
+
+        results = OrderedDict()
+        writes = OrderedDict()
+        for key, (att, value) in collapsed.items():
+            if not isinstance(att, ControllableAttribute):
+                error = OekofenAPIException(f"{key} is unknown or not controllable")
+                results[key] = WriteResult(key, value, None, False, error)
+                continue
+            try:
+                dom_att, val = self._prepare_set_value(att, value)
+            except OekofenAPIException as e:
+                results[key] = WriteResult(key, value, None, False, e)
+                continue
+            results[key] = None  # keeps the order
+            writes[dom_att] = (att, value, val)
+        return results, writes
+
     # Popular queries
     def get_name(self):
         return f"Oekofen ({self.host})"
@@ -307,44 +1184,104 @@ class Oekofen(object):
 
 
 class Domain(object):
+    __slots__ = ("name", "index", "oekofen", "attributes")
+
     def __init__(self, oekofen: Oekofen, name: str, index: int):
-        self.name = name
+        self.name = sys.intern(name)
         self.index = index
         self.oekofen = oekofen
-        self.attributes = OrderedDict()
+        self.attributes = {}
 
     def __repr__(self):
         cls_name = self.__class__.__name__
         return f"{cls_name}({self.name}{self.index})"
 
-    def update_attributes(self, data: dict):
-        for k, v in data.items():
-            if k.startswith(const.JSON_KEY_READONLY_ATTRIBUTE_PREFIX):
-                att = Attribute(domain=self, key=k, data=v)
-            else:
-                att = ControllableAttribute(domain=self, key=k, data=v)
-            self.attributes[k] = att
+    def get_name_with_index(self) -> str:
+        """i.e. hk1 or system"""
+        if self.index is None:
+            return self.name
+        return f"{self.name}{self.index}"
 
+    def update_attributes(
+        self, data: dict, copy_on_write: bool = False, with_schema: bool = False
+    ) -> list:
+        """
+        Creates new attributes, patches the known ones in place and drops
+        the ones missing in `data`
 
-class Attribute(object):
-    def __init__(self, domain: Domain, key: str, data: dict | str):
-        self.key = key
+        :param copy_on_write: changed attributes are replaced by a patched
+            copy, the old object stays unchanged
+        :param with_schema: see Attribute.update_value
+        :return: keys of the created or changed attributes
+        """
+        changed = []
+        for k, v in data.items():
+            att = self.attributes.get(k)
+            if att is None:
+                att = self.attributes[k] = self._create_attribute(k, v)
+                changed.append(k)
+            elif copy_on_write:
+                new_att = att.copy()
+                if new_att.update_value(v, with_schema):
+                    self.attributes[k] = new_att
+                    changed.append(k)
+            elif att.update_value(v, with_schema):
+                changed.append(k)
+        if len(self.attributes) != len(data):
+            for k in [k for k in self.attributes if k not in data]:
+                del self.attributes[k]
+        return changed
+
+    def set_raw_attributes(self, data: dict):
+        """lazy_attributes mode, the attributes are created on first access"""
+        self.attributes = LazyAttributes(self._create_attribute, data)
+
+    def _create_attribute(self, key: str, data: dict | str) -> Attribute:
+        if key.startswith(const.JSON_KEY_READONLY_ATTRIBUTE_PREFIX):
+            return Attribute(domain=self, key=key, data=data)
+        return ControllableAttribute(domain=self, key=key, data=data)
+
+
+class AttributeSchema(object):
+    """
+    unit, factor, min, max, length and choices of an attribute, shared by
+    all attributes with the same json schema (see SCHEMA_REGISTRY)
+    """
+
+    __slots__ = (
+        "key",
+        "format",
+        "unit",
+        "factor",
+        "min",
+        "max",
+        "length",
+        "choices",
+        "decode",
+        "min_value",
+        "max_value",
+    )
 
-        if isinstance(data, str):
-            data = {const.JSON_KEY_VALUE: data}
-
-        self.format: str | None = data.get(const.JSON_KEY_FORMAT, None)
-        self.raw_value: str | float | int | None = data.get(const.JSON_KEY_VALUE, None)
-        self.unit: str | None = data.get(const.JSON_KEY_UNIT_OF_MEASUREMENT, None)
-        self.factor: float | int | None = data.get(const.JSON_KEY_FACTOR, None)
-        self.min: float | int | None = data.get(const.JSON_KEY_MINIMUM, None)
-        self.max: float | int | None = data.get(const.JSON_KEY_MAXIMUM, None)
-        self.length: int | None = data.get(const.JSON_KEY_LENGTH, None)
+    def __init__(
+        self,
+        format: str | None = None,
+        unit: str | None = None,
+        factor: str | float | None = None,
+        min: str | float | None = None,
+        max: str | float | None = None,
+        length: str | int | None = None,
+    ):
+        # the json strings, see get_key
+        self.key = (format, unit, factor, min, max, length)
+        self.format: str | None = format
+        self.unit: str | None = unit
+        self.factor: float | int | None = factor
+        self.min: float | int | None = min
+        self.max: float | int | None = max
+        self.length: int | None = length
         self.choices = None
-        self.domain: Domain = domain
         if self.format:
-            self.choices = const.format2dict(self.format)
-        self.attributes = {}
+            self.choices = const.format2choices(self.format)
 
         # fix '?C' unit:
         if isinstance(self.unit, str) and self.unit == "?C":
@@ -353,10 +1290,6 @@ class Attribute(object):
         # convert numbers in strings to int/float
         if isinstance(self.factor, str):
             self.factor = float(self.factor)
-            if self.factor == float(1):
-                self.raw_value = int(self.raw_value)
-            else:
-                self.raw_value = float(self.raw_value)
             if self.min is not None:
                 self.min = float(self.min)
             if self.max is not None:
@@ -364,19 +1297,145 @@ class Attribute(object):
         if isinstance(self.length, str):
             self.length = int(self.length)
 
+        # decoder of raw values, resolved once
+        if self.factor is not None:
+            # i.e. temperature or zs (zehntelsekunden, 0,1 seconds)
+            self.decode = functools.partial(_decode_scaled, self.factor)
+        elif self.format == const.OFF_ON_TEXT:
+            self.decode = _decode_off_on
+        else:
+            # choices (see get_choice) and plain strings
+            self.decode = _decode_raw
+        # a falsy min/max is decoded from the raw value, see Attribute.get_value
+        self.min_value = self.decode(self.min) if self.min else None
+        self.max_value = self.decode(self.max) if self.max else None
+
+    def __repr__(self):
+        cls_name = self.__class__.__name__
+        return f"{cls_name}(unit={self.unit}, factor={self.factor}, min={self.min}, max={self.max})"
+
+    @classmethod
+    def from_key(cls, key: tuple) -> AttributeSchema:
+        return cls(*key)
+
+    @staticmethod
+    def get_key(data: dict) -> tuple:
+        return (
+            data.get(const.JSON_KEY_FORMAT, None),
+            data.get(const.JSON_KEY_UNIT_OF_MEASUREMENT, None),
+            data.get(const.JSON_KEY_FACTOR, None),
+            data.get(const.JSON_KEY_MINIMUM, None),
+            data.get(const.JSON_KEY_MAXIMUM, None),
+            data.get(const.JSON_KEY_LENGTH, None),
+        )
+
+
+def _decode_scaled(factor: float, value) -> float:
+    # same as float("{:.2f}".format(round(v, 2))) without the string round-trip
+    return round(float(value) * factor, 2)
+
+
+def _decode_off_on(value) -> bool:
+    # bool on/off
+    return value != 0
+
+
+def _decode_raw(value):
+    return value
+
+
+SCHEMA_REGISTRY = SharedRegistry(
+    AttributeSchema.from_key, maxsize=const.SCHEMA_REGISTRY_MAXSIZE
+)
+_EMPTY_SCHEMA_KEY = (None, None, None, None, None, None)
+_EMPTY_ATTRIBUTES = MappingProxyType({})
+
+
+class Attribute(object):
+    __slots__ = ("key", "raw_value", "domain", "schema", "_attributes", "_value")
+
+    def __init__(self, domain: Domain, key: str, data: dict | str):
+        self.key = sys.intern(key)
+        self.domain: Domain = domain
+        self.raw_value: str | float | int | None = None
+        self._attributes = None
+        self._value = _MISSING
+
+        if isinstance(data, str):
+            self.schema = SCHEMA_REGISTRY.get(_EMPTY_SCHEMA_KEY)
+            self._set_raw_value(data)
+        else:
+            self.schema = SCHEMA_REGISTRY.get(AttributeSchema.get_key(data))
+            self._set_raw_value(data.get(const.JSON_KEY_VALUE, None))
+
+    @property
+    def format(self) -> str | None:
+        return self.schema.format
+
+    @property
+    def unit(self) -> str | None:
+        return self.schema.unit
+
+    @property
+    def factor(self) -> float | int | None:
+        return self.schema.factor
+
+    @property
+    def min(self) -> float | int | None:
+        return self.schema.min
+
+    @property
+    def max(self) -> float | int | None:
+        return self.schema.max
+
+    @property
+    def length(self) -> int | None:
+        return self.schema.length
+
+    @property
+    def choices(self):
+        return self.schema.choices
+
+    @property
+    def attributes(self):
+        """thirdparty (shelly) sensor details, empty for all others"""
+        if self._attributes is None:
+            return _EMPTY_ATTRIBUTES
+        return self._attributes
+
+    @attributes.setter
+    def attributes(self, value: dict):
+        self._attributes = value
+
+    def _set_raw_value(self, raw_value):
+        self.raw_value = raw_value
+        self._value = _MISSING
+
+        # convert numbers in strings to int/float
+        if self.factor is not None and isinstance(self.raw_value, str):
+            if self.factor == float(1):
+                self.raw_value = int(self.raw_value)
+            else:
+                self.raw_value = float(self.raw_value)
+
         # keys with "format" can have non-int values as well
         if isinstance(self.format, str) and isinstance(self.raw_value, str):
-            if self.raw_value == "false":
+            if self.raw_value == const.JSON_VALUE_FALSE:
                 self.raw_value = 0
-            elif self.raw_value == "true":
+            elif self.raw_value == const.JSON_VALUE_TRUE:
                 self.raw_value = 1
             else:
                 self.raw_value = int(self.raw_value)
 
         # handle thirdparty (shelly) temp sensors
-        if self.domain.name == 'thirdparty' and '|' in self.raw_value and self.key == 'L_state':
+        if (
+            self.domain.name == 'thirdparty'
+            and self.key == 'L_state'
+            and isinstance(self.raw_value, str)
+            and '|' in self.raw_value
+        ):
             p = self.raw_value.split('|')
-            self.attributes = {
+            self._attributes = {
                 'type_id': p[0],
                 'device_id': p[1],
                 'device_id_2': p[2],
@@ -387,30 +1446,62 @@ class Attribute(object):
                 'timestamp': p[7],
                 'device_ip': p[8],
             }
+        elif self._attributes is not None:
+            self._attributes = None
+
+    def copy(self) -> Attribute:
+        """shallow copy, shares domain and schema"""
+        att = object.__new__(self.__class__)
+        att.key = self.key
+        att.raw_value = self.raw_value
+        att.domain = self.domain
+        att.schema = self.schema
+        att._attributes = self._attributes
+        att._value = self._value
+        return att
+
+    def update_value(self, data: dict | str, with_schema: bool = False) -> bool:
+        """
+        Patches raw_value in place (incremental refresh)
+
+        :param data: attribute json data, i.e. {"val": "486", ...} or "Heizbetrieb"
+        :param with_schema: `data` has the formats, a changed schema is applied
+        :return: True if raw_value or the schema changed
+        """
+        schema_changed = False
+        if isinstance(data, str):
+            raw_value = data
+        else:
+            raw_value = data.get(const.JSON_KEY_VALUE, None)
+            if with_schema:
+                schema_key = AttributeSchema.get_key(data)
+                if schema_key != self.schema.key:
+                    self.schema = SCHEMA_REGISTRY.get(schema_key)
+                    schema_changed = True
+        old_raw_value = self.raw_value
+        self._set_raw_value(raw_value)
+        return schema_changed or self.raw_value != old_raw_value
 
     def __repr__(self):
         cls_name = self.__class__.__name__
         return f"{cls_name}({self.key}={self.get_value_with_unit()})"
 
     def get_value(self, value=None):
-        if not value:
-            value = self.raw_value
-        if value is not None:
-            if self.factor is not None:
-                # i.e. temperature or zs (zehntelsekunden, 0,1 seconds)
-                v = float(value) * self.factor
-                return float("{:.2f}".format(round(v, 2)))
-            # handle thirdparty shelly temp sensors
-            if self.domain.name == 'thirdparty' and '|' in self.raw_value and self.key == 'L_state':
-                temp_sensor = float(int(self.raw_value.split('|')[4]) / 10)
-                return temp_sensor
-            if self.format == const.OFF_ON_TEXT:
-                # bool on/off
-                if value == 0:
-                    return False
-                else:
-                    return True
-        return value
+        if value:
+            return self._decode(value)
+        # decoded raw_value, cached until the next _set_raw_value
+        decoded = self._value
+        if decoded is _MISSING:
+            decoded = self._value = self._decode(self.raw_value)
+        return decoded
+
+    def _decode(self, value):
+        if value is None:
+            return None
+        # handle thirdparty shelly temp sensors
+        if self._attributes is not None and self.schema.factor is None:
+            return float(int(self._attributes['temperature']) / 10)
+        return self.schema.decode(value)
 
     def get_value_with_unit(self) -> str:
         if self.unit:
@@ -423,14 +1514,20 @@ class Attribute(object):
 
     def get_min_value(self):
         if self.min is not None:
+            if self.min and self._attributes is None:
+                return self.schema.min_value
             return self.get_value(value=self.min)
 
     def get_max_value(self):
         if self.max is not None:
+            if self.max and self._attributes is None:
+                return self.schema.max_value
             return self.get_value(value=self.max)
 
 
 class ControllableAttribute(Attribute):
+    __slots__ = ()
+
     def generate_new_value(self, value, value_in_human_format=True):
         """
 
@@ -480,9 +1577,35 @@ class MyOekofen(object):
         pass
 
 
-class OekofenAPIException(Exception):
-    pass
+# LazyData getters of lazy_attributes mode, source is (LazyAttributes, att_key)
+def _get_lazy_value(source):
+    attributes, key = source
+    return attributes[key].get_value()
+
+
+def _get_lazy_choice(source):
+    attributes, key = source
+    return attributes[key].get_choice()
+
+
+def _get_lazy_min_value(source):
+    attributes, key = source
+    return attributes[key].get_min_value()
+
+
+def _get_lazy_max_value(source):
+    attributes, key = source
+    return attributes[key].get_max_value()
+
+
+def __getattr__(name):
+    # aio and fleet build on Oekofen, they are imported on first access
+    if name == "AsyncOekofen":
+        from .aio import AsyncOekofen
 
+        return AsyncOekofen
+    if name == "OekofenFleet":
+        from .fleet import OekofenFleet
 
-class ValueOutOfBoundaryError(OekofenAPIException):
-    pass
+        return OekofenFleet
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
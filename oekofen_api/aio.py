@@ -0,0 +1,341 @@
+"""asyncio client, non-blocking I/O with stdlib streams"""
+
+from __future__ import annotations
+
+import asyncio
+from email.message import Message
+import http.client
+import logging
+
+from . import const, csvlog, jsondecode, Oekofen, ControllableAttribute, _MISSING
+from .batch import WriteResult
+from .exceptions import CircuitOpenError, OekofenAPIException, OekofenHTTPError
+from .retry import RetryPolicy
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class AsyncOekofen(Oekofen):
+    """
+    Same surface as Oekofen, but the I/O methods are coroutines:
+
+        client = AsyncOekofen("192.168.178.222", "eMlG")
+        await client.update_data()
+        await client.get_version()
+
+    Parsing (Domain/Attribute, schema cache, csv) is shared with Oekofen.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        json_password: str,
+        port: int = const.DEFAULT_PORT,
+        update_interval: int = const.UPDATE_INTERVAL_SECONDS,
+        timeout: float = const.REQUEST_TIMEOUT_SECONDS,
+        retries: int = 1,
+        retry_delay: float = const.RETRY_DELAY_SECONDS,
+        **kwargs,
+    ):
+        """
+        :param timeout: seconds per request in total, the connect_timeout and
+            read_timeout kwargs limit connecting and reading the response
+        :param retries: shortcut for retry_policy=RetryPolicy(retries, retry_delay)
+
+        Every request uses its own connection, counted in connection_stats['new'].
+        """
+        kwargs.setdefault(
+            'retry_policy', RetryPolicy(retries=retries, base_delay=retry_delay)
+        )
+        super().__init__(
+            host=host,
+            json_password=json_password,
+            port=port,
+            update_interval=update_interval,
+            **kwargs,
+        )
+        self.timeout = timeout
+        self._update_task = None
+
+    async def update_data(self):
+        """concurrent calls share one in-flight fetch"""
+        if self._has_valid_data():
+            return None
+        if self._update_task is None:
+            self.update_stats['fetches'] += 1
+            self._update_task = asyncio.ensure_future(self._update_data_once())
+        else:
+            self.update_stats['coalesced'] += 1
+        # a cancelled caller must not cancel the fetch shared with the others
+        return await asyncio.shield(self._update_task)
+
+    async def _update_data_once(self):
+        try:
+            try:
+                self._raw_data = await self._fetch_raw_data()
+            except CircuitOpenError as e:
+                return self._serve_last_data(e)
+            return self._apply_raw_data()
+        finally:
+            if self._update_task is asyncio.current_task():
+                self._update_task = None
+
+    def cancel_update(self) -> bool:
+        """
+        Cancels the in-flight fetch, update_data shields it from the
+        cancellation of its callers
+
+        :return: False if no fetch was running
+        """
+        task = self._update_task
+        if task is None or task.done():
+            return False
+        self._update_task = None
+        task.cancel()
+        return True
+
+    async def _fetch_raw_data(self) -> dict:
+        if not self.schema_cache:
+            return await self._fetch_documents(with_formats=True)
+        if self._schema_is_outdated():
+            return await self.refresh_schema()
+        values = await self._fetch_documents(with_formats=False)
+        raw_data = self._merge_with_schema(self._schema, values)
+        if raw_data is None:
+            _LOGGER.info("[AsyncOekofen._fetch_raw_data] unknown keys, refreshing schema")
+            return await self.refresh_schema()
+        return raw_data
+
+    async def refresh_schema(self) -> dict:
+        return self._set_schema(await self._fetch_documents(with_formats=True))
+
+    async def _fetch_documents(self, with_formats: bool) -> dict:
+        return self._merge_documents(
+            [
+                await self._fetch_data(path=path, is_json=True)
+                for path in self._get_document_paths(with_formats)
+            ]
+        )
+
+    async def get_version(self):
+        text_data = await self._fetch_data("??", is_json=False, is_text=True)
+        return self._parse_version(text_data)
+
+    async def update_csv_data(self):
+        csv_data = await self._fetch_data("log", is_json=False, is_text=True)
+        return self._parse_csv_data(csv_data)
+
+    async def iter_csv_log(self):
+        """
+        Like Oekofen.iter_csv_log, but the log is fetched as a whole first:
+
+            for row in await client.iter_csv_log():
+        """
+        csv_data = await self._fetch_data("log", is_json=False, is_text=True)
+        return csvlog.iter_csv_rows(csv_data.split(const.CSV_LINE_SEPARATOR))
+
+    async def get_csv_columns(self):
+        """Oekofen.get_csv_columns, the conversion runs in the default executor"""
+        from . import columnar
+
+        csv_data = await self._fetch_data("log", is_json=False, is_text=True)
+        return await asyncio.get_running_loop().run_in_executor(
+            None, columnar.load_csv_columns, csv_data.split(const.CSV_LINE_SEPARATOR)
+        )
+
+    async def update_csv_tail(self, force: bool = False) -> list:
+        """see Oekofen.update_csv_tail"""
+        if self._csv_tail_is_fresh(force):
+            return []
+
+        tail = self._csv_tail
+        rows = None
+        range_start = tail.get_range_start()
+        if range_start:
+            status, headers, raw_data = await asyncio.wait_for(
+                self._request("log", headers={"Range": f"bytes={range_start}-"}),
+                timeout=self.timeout,
+            )
+            if status == 206:
+                rows = tail.feed(raw_data, offset=range_start)
+            elif status == 200:
+                # Range not supported
+                rows = tail.feed(raw_data)
+        if rows is None:
+            _LOGGER.info("[AsyncOekofen.update_csv_tail] (re)syncing csv log, %s", tail)
+            status, headers, raw_data = await asyncio.wait_for(
+                self._request("log"), timeout=self.timeout
+            )
+            if status != 200:
+                raise OekofenHTTPError(f"{self.base_url}log", status)
+            rows = tail.feed(raw_data)
+        return self._apply_csv_tail(rows)
+
+    async def _send_set_value(self, domain_attribute: str, value: str):
+        await self._fetch_data(
+            path=self._get_set_value_path(domain_attribute, value), is_json=False
+        )
+
+    async def set_attribute_value(self, att, value, verify: bool = False):
+        if not isinstance(att, ControllableAttribute):
+            return False
+        dom_att, val = self._prepare_set_value(att, value)
+        await self._send_set_value(domain_attribute=dom_att, value=val)
+        read_back = await self._read_back(att) if verify else _MISSING
+        if not self._write_through(att, val, read_back):
+            raise OekofenAPIException(f"{dom_att}={val} not confirmed by the controller")
+        return value
+
+    async def _read_back(self, att):
+        domain_with_index = att.domain.get_name_with_index()
+        document = await self._fetch_data(path=domain_with_index, is_json=True)
+        return self._get_read_back_value(document, domain_with_index, att.key)
+
+    async def set_many(self, values, verify: bool = False):
+        results, writes = self._prepare_writes(values)
+        for dom_att, (att, value, val) in writes.items():
+            try:
+                await self._send_set_value(domain_attribute=dom_att, value=val)
+                read_back = await self._read_back(att) if verify else _MISSING
+            except Exception as e:
+                results[dom_att] = WriteResult(dom_att, value, val, False, e)
+                continue
+            results[dom_att] = self._get_write_result(dom_att, att, value, val, read_back)
+        return results
+
+    async def set_heating_circuit_temp(self, celsius: float, domain_index: int = 1) -> bool:
+        att = self.get_attribute("hk", "temp_heat", domain_index=domain_index)
+        return await self.set_attribute_value(att, celsius)
+
+    async def _fetch_data(self, path, is_json=True, is_text=False, retry=True):
+        """
+        Like Oekofen._fetch_data, but the backoff does not block the event
+        loop. Cancellation is never swallowed.
+        """
+        breaker = self.circuit_breaker
+        if not breaker.allow():
+            raise CircuitOpenError(f"{self.host}:{self.port} is failing, {breaker}")
+        # the outcome must reach the breaker, a pending probe blocks all others
+        recorded = False
+        try:
+            attempts = self.retry_policy.retries + 1 if retry else 1
+            for attempt in range(attempts):
+                try:
+                    data = await self._fetch_data_once(
+                        path=path, is_json=is_json, is_text=is_text
+                    )
+                except Exception as e:
+                    if not self.retry_policy.is_retryable(e):
+                        # the controller answered
+                        recorded = True
+                        breaker.record_success()
+                        _LOGGER.error(e)
+                        raise
+                    if attempt + 1 >= attempts:
+                        self.retry_stats['exhausted'] += 1
+                        recorded = True
+                        breaker.record_failure(e)
+                        _LOGGER.error(e)
+                        raise
+                    delay = self.retry_policy.get_delay(attempt)
+                    self.retry_stats['retries'] += 1
+                    _LOGGER.info(
+                        "[AsyncOekofen._fetch_data] %r, retrying in %.1fs", e, delay
+                    )
+                    await asyncio.sleep(delay)
+                else:
+                    recorded = True
+                    breaker.record_success()
+                    return data
+        finally:
+            if not recorded:
+                breaker.record_aborted()
+
+    async def _fetch_data_once(self, path, is_json=True, is_text=False):
+        _LOGGER.info("[AsyncOekofen._fetch_data] url=%s%s", self.base_url, path)
+        status, headers, raw_data = await asyncio.wait_for(
+            self._request(path), timeout=self.timeout
+        )
+        if status != 200:
+            raise OekofenHTTPError(f"{self.base_url}{path}", status)
+        if is_json:
+            msg = Message()
+            msg["content-type"] = headers.get("content-type", "")
+            encoding = msg.get_content_charset(const.CHARSET)
+            return jsondecode.loads(raw_data, encoding)
+        if is_text:
+            return raw_data.decode(const.CHARSET)
+        return True
+
+    async def _request(self, path: str, headers: dict | None = None) -> tuple:
+        """
+        Minimal HTTP/1.1 GET
+
+        :return: (status, headers, body)
+        """
+        host, port = self._url.host, self._url.port
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(host, port), timeout=self.connect_timeout
+        )
+        self.connection_stats['new'] += 1
+        try:
+            request = (
+                f"GET {self._url.raw_path}{path} HTTP/1.1\r\n"
+                f"Host: {host}:{port}\r\n"
+                "Connection: close\r\n"
+            )
+            for name, value in (headers or {}).items():
+                request += f"{name}: {value}\r\n"
+            request += "\r\n"
+            writer.write(request.encode("ascii"))
+            await writer.drain()
+            return await asyncio.wait_for(
+                self._read_response(reader), timeout=self.read_timeout
+            )
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+
+    async def _read_response(self, reader: asyncio.StreamReader) -> tuple:
+        """:return: (status, headers, body)"""
+        status = self._parse_status_line(await reader.readline())
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode(const.CHARSET).partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size_line = await reader.readline()
+                if not size_line:
+                    raise asyncio.IncompleteReadError(b"".join(chunks), None)
+                size = int(size_line.split(b";")[0], 16)
+                if size == 0:
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readline()
+            body = b"".join(chunks)
+        elif "content-length" in headers:
+            body = await reader.readexactly(int(headers["content-length"]))
+        else:
+            body = await reader.read()
+        return status, headers, body
+
+    @staticmethod
+    def _parse_status_line(status_line: bytes) -> int:
+        """like http.client, a closed or garbled response is retryable"""
+        if not status_line:
+            raise http.client.RemoteDisconnected(
+                "Remote end closed connection without response"
+            )
+        parts = status_line.split(None, 2)
+        if len(parts) < 2 or not parts[0].startswith(b"HTTP/") or not parts[1].isdigit():
+            raise http.client.BadStatusLine(status_line.decode(const.CHARSET))
+        return int(parts[1])
@@ -0,0 +1,54 @@
+"""Batched attribute writes"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Any, NamedTuple
+
+
+class WriteResult(NamedTuple):
+    key: str  # i.e. "hk1.temp_heat"
+    value: Any  # requested value, human format
+    raw_value: Any  # value sent to the controller, None if not sent
+    ok: bool
+    error: Exception | None
+
+
+class WriteBatch(object):
+    """
+    Collects writes and sends them on exit, see Oekofen.set_many()
+
+        with client.write_batch() as batch:
+            batch.set("hk1.temp_heat", 22)
+            batch.set("hk2.mode_auto", 1)
+        batch.results  # OrderedDict "hk1.temp_heat" -> WriteResult
+
+    AsyncOekofen: ``async with client.write_batch() as batch``
+    """
+
+    def __init__(self, oekofen):
+        self.oekofen = oekofen
+        self.values = []
+        self.results = OrderedDict()
+
+    def __repr__(self):
+        cls_name = self.__class__.__name__
+        return f"{cls_name}({len(self.values)} writes)"
+
+    def set(self, key, value):
+        """:param key: Attribute, "hk1.temp_heat" or ("hk", 1, "temp_heat")"""
+        self.values.append((key, value))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.results = self.oekofen.set_many(self.values)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.results = await self.oekofen.set_many(self.values)
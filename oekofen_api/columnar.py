@@ -0,0 +1,163 @@
+"""
+Columnar (NumPy) view of the csv log, optional dependency:
+
+    pip install oekofen_api[numpy]
+
+    columns = client.get_csv_columns()
+    columns["timestamp"]      # datetime64[s]
+    columns["AT [°C]"]        # float32
+    columns["PE1 Status"]     # int8
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from itertools import islice
+import logging
+from typing import Iterable
+
+from . import const
+from .csvlog import CsvLogSchema
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+_LOGGER = logging.getLogger(__name__)
+
+# "17.10.2026" -> "2026-10-17"
+_DATE_LENGTH = 10
+_DATE_TO_ISO = [6, 7, 8, 9, 2, 3, 4, 5, 0, 1]
+_TIME_LENGTH = 8
+
+
+def load_csv_columns(
+    lines: Iterable[str], chunk_rows: int = const.COLUMNAR_CHUNK_ROWS
+) -> OrderedDict:
+    """
+    Loads csv log lines (first line is the header) into one typed array per
+    column. Comma values become float32, integers the smallest fitting int
+    type, the date and time column datetime64[D]/timedelta64[s] and an
+    additional "timestamp" column datetime64[s].
+
+    The lines are converted `chunk_rows` at a time, a column that does not
+    convert in every chunk is returned as str. Rows with less cells than
+    the header are skipped.
+    """
+    if np is None:
+        raise ImportError("numpy is required, pip install oekofen_api[numpy]")
+
+    lines = iter(lines)
+    schema = CsvLogSchema.from_header(next(lines))
+    n_columns = max((position for position, name in schema.columns), default=-1) + 1
+    parts = OrderedDict((name, []) for position, name in schema.columns)
+    short_rows = 0
+    while True:
+        chunk = list(islice(lines, chunk_rows))
+        if not chunk:
+            break
+        rows = [line.split(const.CSV_COLUMN_SEPARATOR) for line in chunk if line]
+        n_rows = len(rows)
+        rows = [row for row in rows if len(row) >= n_columns]
+        short_rows += n_rows - len(rows)
+        if not rows:
+            continue
+        cells = list(zip(*rows))
+        for position, name in schema.columns:
+            column = np.char.strip(np.array(cells[position], dtype=str))
+            parts[name].append(_convert(column))
+    if short_rows:
+        _LOGGER.warning(
+            "[columnar.load_csv_columns] skipped %s rows with less than %s cells",
+            short_rows,
+            n_columns,
+        )
+
+    columns = OrderedDict()
+    date_column = time_column = None
+    for position, name in schema.columns:
+        column = _merge(parts.pop(name))
+        if column.dtype.kind == "M":
+            date_column = column
+        elif column.dtype.kind == "m":
+            time_column = column
+            if date_column is not None:
+                columns["timestamp"] = date_column.astype("datetime64[s]") + column
+        columns[name] = column
+    if time_column is None and date_column is not None:
+        columns["timestamp"] = date_column.astype("datetime64[s]")
+    return columns
+
+
+def _convert(column):
+    """one chunk of a column, numbers as int64/float64, see _merge"""
+    if _is_date(column):
+        return _to_date(column)
+    if _is_time(column):
+        return _to_time(column)
+    return _to_number(column)
+
+
+def _merge(parts: list):
+    """concatenates the chunks of a column, numbers get their smallest type"""
+    if not parts:
+        return np.array([], dtype=str)
+    kinds = {part.dtype.kind for part in parts}
+    if len(kinds) > 1 and not kinds <= {"i", "f"}:
+        parts = [part.astype(str) for part in parts]
+    column = np.concatenate(parts)
+    if column.dtype.kind == "f":
+        return column.astype(np.float32)
+    if column.dtype.kind == "i":
+        low, high = column.min(), column.max()
+        for dtype in (np.int8, np.int16, np.int32):
+            info = np.iinfo(dtype)
+            if info.min <= low and high <= info.max:
+                return column.astype(dtype)
+    return column
+
+
+def _is_date(column) -> bool:
+    return bool(
+        np.all(np.char.str_len(column) == _DATE_LENGTH)
+        and np.all(np.char.count(column, ".") == 2)
+    )
+
+
+def _is_time(column) -> bool:
+    return bool(
+        np.all(np.char.str_len(column) == _TIME_LENGTH)
+        and np.all(np.char.count(column, ":") == 2)
+    )
+
+
+def _to_date(column):
+    chars = column.astype(f"U{_DATE_LENGTH}").view("U1").reshape(-1, _DATE_LENGTH)
+    iso = np.ascontiguousarray(chars[:, _DATE_TO_ISO])
+    iso[:, [4, 7]] = "-"
+    return iso.view(f"U{_DATE_LENGTH}").ravel().astype("datetime64[D]")
+
+
+def _to_time(column):
+    chars = column.astype(f"U{_TIME_LENGTH}").view("U1").reshape(-1, _TIME_LENGTH)
+    hours = _chars_to_int(chars[:, 0:2])
+    minutes = _chars_to_int(chars[:, 3:5])
+    seconds = _chars_to_int(chars[:, 6:8])
+    return (hours * 3600 + minutes * 60 + seconds).astype("timedelta64[s]")
+
+
+def _chars_to_int(chars):
+    return np.ascontiguousarray(chars).view(f"U{chars.shape[1]}").ravel().astype(np.int64)
+
+
+def _to_number(column):
+    """comma values -> float64, integers -> int64, else str"""
+    if np.any(np.char.count(column, ",") > 0):
+        try:
+            return np.char.replace(column, ",", ".").astype(np.float64)
+        except ValueError:
+            return column
+    if np.all(np.char.isdigit(np.char.lstrip(column, "-"))):
+        return column.astype(np.int64)
+    return column
@@ -3,15 +3,48 @@ Constants
 """
 from __future__ import annotations
 from collections import OrderedDict
+from types import MappingProxyType
+from typing import Mapping
+
+from .registry import SharedRegistry
 
 ATTR_TYPE_DICT = 'key-value-pair'
 ATTR_TYPE_DESCRIPTION = 'description-text'
 BASE_URL_TMPL = 'http://{host}:{port}/{json_password}/'
 URL_PATH_ALL_WITH_FORMATS = 'all?'
+URL_PATH_ALL_VALUES = 'all'
+URL_FORMATS_SUFFIX = '?'
 RE_FIND_NUMBERS = r'\d+'
 DEFAULT_PORT = 4321
 UPDATE_INTERVAL_SECONDS = 10
+SCHEMA_REFRESH_INTERVAL_SECONDS = 3600
 CHARSET = 'ISO-8859-1'
+CSV_LINE_SEPARATOR = '\r\n'
+CSV_COLUMN_SEPARATOR = ';'
+CONNECT_TIMEOUT_SECONDS = 5
+REQUEST_TIMEOUT_SECONDS = 10
+RETRY_DELAY_SECONDS = 2.5
+RETRY_COUNT = 1
+RETRY_MAX_DELAY_SECONDS = 30
+RETRY_JITTER = 0.5
+CIRCUIT_FAILURE_THRESHOLD = 3
+CIRCUIT_RESET_TIMEOUT_SECONDS = 60
+
+# OekofenFleet
+FLEET_MAX_CONCURRENCY = 16
+FLEET_DEADLINE_SECONDS = 15
+FLEET_BACKOFF_SECONDS = 10
+FLEET_MAX_BACKOFF_SECONDS = 600
+
+# PollScheduler
+SCHEDULER_MIN_INTERVAL_SECONDS = 2
+SCHEDULER_MAX_INTERVAL_SECONDS = 300
+SCHEDULER_WATCH = ['pe*.L_state', 'pe*.L_modulation', 'pe*.L_temp_act', 'hk*.L_flowtemp_act']
+SCHEDULER_LATENCY_FACTOR = 4
+SCHEDULER_ACTIVITY_WEIGHT = 0.3
+
+# History, samples per key (one day of minutely polls)
+HISTORY_CAPACITY = 1440
 
 # JSON Keys
 JSON_KEY_FORMAT = 'format'
@@ -22,6 +55,8 @@ JSON_KEY_MINIMUM = 'min'
 JSON_KEY_MAXIMUM = 'max'
 JSON_KEY_LENGTH = 'length'
 JSON_KEY_READONLY_ATTRIBUTE_PREFIX = 'L_'
+JSON_VALUE_TRUE = 'true'
+JSON_VALUE_FALSE = 'false'
 
 # Installateur Code (aka "Codeebene")
 # combination from hour (with leading zeros) and date day (with leading zeros)
@@ -36,6 +71,24 @@ def format2dict(value: str) -> dict:
     return d
 
 
+def _parse_choices(value: str) -> Mapping[int, str]:
+    return MappingProxyType(format2dict(value))
+
+
+# every distinct format string is parsed once, i.e. "0:Aus|1:Ein"
+CHOICES_REGISTRY_MAXSIZE = 512
+CHOICES_REGISTRY = SharedRegistry(_parse_choices, maxsize=CHOICES_REGISTRY_MAXSIZE)
+
+
+# attributes with the same unit/factor/min/max/length/format share one schema
+SCHEMA_REGISTRY_MAXSIZE = 1024
+
+
+def format2choices(value: str) -> Mapping[int, str]:
+    """like format2dict, but returns a shared read-only mapping"""
+    return CHOICES_REGISTRY.get(value)
+
+
 # conversion
 IS_TEMP_ATTR = [
     'L_ambient',
@@ -97,6 +150,32 @@ PE_STATE_PERFORMANCE_FIRE = 4
 PE_STATE_TRAILING = 5
 PE_STATES_OFF = [6, 97, 98, 99, 100, 101]
 PE_STATES_ERROR = [8, 9, 11]
+PE_STATE_CONTINUOUS = 0
+PE_STATES_BURNING = [
+    PE_STATE_CONTINUOUS,
+    PE_STATE_START,
+    PE_STATE_FIRING,
+    PE_STATE_SOFTSTART,
+    PE_STATE_PERFORMANCE_FIRE,
+]
+
+# Pellet consumption estimate, see README "Berechnung Pelletsverbrauch"
+PELLET_NOMINAL_POWER_KW = 7.8
+PELLET_ENERGY_KWH_PER_KG = 4.9
+PELLET_EFFICIENCY = 0.9
+# samples further apart are not integrated (polling or log gap)
+PELLET_MAX_GAP_SECONDS = 900
+# storage fill drops below this are controller rounding, not used for calibration
+PELLET_CALIBRATION_MIN_KG = 10
+PELLET_CALIBRATION_WEIGHT = 0.2
+CSV_COLUMN_PE_MODULATION = 'PE{index} Modulation[%]'
+CSV_COLUMN_PE_STATE = 'PE{index} Status'
+
+# LocalStore, key prefix of the /log columns
+STORE_CSV_KEY_PREFIX = 'log.'
+
+# columnar.load_csv_columns, csv lines converted at once
+COLUMNAR_CHUNK_ROWS = 2000
 
 # Pump
 PUMP_STATE_OFF = 0
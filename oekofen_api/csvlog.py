@@ -0,0 +1,164 @@
+"""
+Parsing of the csv log (http://<ip>:<port>/<json_password>/log)
+
+    Datum ;Zeit ;AT [»C];PE1 KT[»C];...
+    17.10.2026 ;00:01:00 ;1,1;30,9;...
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from datetime import datetime
+from typing import Iterable, Iterator
+
+from . import const
+
+
+def parse_csv_value(raw_value: str, dt_day: datetime) -> tuple:
+    """
+    Converts one csv cell
+
+    :param dt_day: date/time of the row so far, date and time cells replace its parts
+    :return: (value, dt_day, is_time)
+    """
+    if "," in raw_value:
+        return float(raw_value.replace(",", ".")), dt_day, False
+    if "." in raw_value and len(raw_value.split(".")) == 3:
+        day, month, year = raw_value.split(".")
+        dt_day = dt_day.replace(year=int(year), month=int(month), day=int(day))
+        return dt_day.date(), dt_day, False
+    if ":" in raw_value and len(raw_value.split(":")) == 3:
+        t_hour, t_min, t_sec = raw_value.split(":")
+        dt_day = dt_day.replace(hour=int(t_hour), minute=int(t_min), second=int(t_sec))
+        return dt_day.time(), dt_day, True
+    if raw_value.isdigit():
+        return int(raw_value), dt_day, False
+    return raw_value, dt_day, False
+
+
+class CsvLogSchema(object):
+    """Column schema parsed once from the header line"""
+
+    def __init__(self, columns: list):
+        """:param columns: [(position, name), ...]"""
+        self.columns = columns
+
+    def __repr__(self):
+        cls_name = self.__class__.__name__
+        return f"{cls_name}({len(self.columns)} columns)"
+
+    @classmethod
+    def from_header(cls, line: str) -> CsvLogSchema:
+        columns = []
+        for position, content in enumerate(line.split(const.CSV_COLUMN_SEPARATOR)):
+            content = content.replace("[»C]", "[°C]").rstrip()
+            if len(content):
+                columns.append((position, content))
+        return cls(columns)
+
+    def get_names(self) -> list:
+        return [name for position, name in self.columns]
+
+    def parse_row(self, line: str, dt_day: datetime | None = None) -> OrderedDict:
+        """
+        :return: OrderedDict column name -> value, the row's datetime is
+            added as "timestamp" in front of the time column
+        """
+        if dt_day is None:
+            dt_day = datetime.now().replace(microsecond=0)
+        cells = line.split(const.CSV_COLUMN_SEPARATOR)
+        row = OrderedDict()
+        for position, name in self.columns:
+            value, dt_day, is_time = parse_csv_value(cells[position], dt_day)
+            if is_time:
+                row["timestamp"] = dt_day
+            row[name] = value
+        return row
+
+
+def iter_csv_rows(lines: Iterable[str]) -> Iterator[OrderedDict]:
+    """
+    Yields the parsed rows one at a time, the first line is the header
+
+    :param lines: csv lines without line separators
+    """
+    schema = None
+    dt_day = datetime.now().replace(microsecond=0)
+    for line in lines:
+        if schema is None:
+            schema = CsvLogSchema.from_header(line)
+            continue
+        if not line:
+            continue
+        yield schema.parse_row(line, dt_day=dt_day)
+
+
+class CsvLogTail(object):
+    """
+    Remembers the position in the csv log, so only new rows are parsed
+
+    The last complete line and its byte offset are kept, a follow-up
+    request fetches the log from that offset (http Range) and must start
+    with that line, otherwise the log was rotated or truncated and the
+    caller resyncs with a full fetch.
+    """
+
+    def __init__(self):
+        self.schema = None
+        self.header = None
+        self.last_line = None
+        self.last_line_offset = None
+        self.last_timestamp = None
+        self.last_fetch = None
+
+    def __repr__(self):
+        cls_name = self.__class__.__name__
+        return f"{cls_name}(offset={self.last_line_offset}, last_timestamp={self.last_timestamp})"
+
+    def get_range_start(self) -> int | None:
+        if self.last_line is None:
+            return None
+        return self.last_line_offset
+
+    def feed(self, body: bytes, offset: int = 0) -> list | None:
+        """
+        :param body: log bytes starting at byte `offset`
+        :return: rows newer than the last seen row, None if `body` does not
+            continue the known log (resync needed). The first full feed only
+            returns the newest row.
+        """
+        separator = const.CSV_LINE_SEPARATOR.encode(const.CHARSET)
+        lines = body.split(separator)
+        # the last element is b"" or an incomplete line
+        complete_lines = lines[:-1]
+        if offset:
+            if not complete_lines or complete_lines[0] != self.last_line:
+                return None
+        elif complete_lines:
+            header = complete_lines[0]
+            if header != self.header:
+                self.header = header
+                self.schema = CsvLogSchema.from_header(header.decode(const.CHARSET))
+
+        first_sync = self.last_line is None
+        dt_day = datetime.now().replace(microsecond=0)
+        rows = []
+        position = offset
+        for nr, line in enumerate(complete_lines):
+            line_offset = position
+            position += len(line) + len(separator)
+            if nr == 0 or not line:
+                # header or the already known last line
+                continue
+            self.last_line = line
+            self.last_line_offset = line_offset
+            if first_sync and nr < len(complete_lines) - 1:
+                continue
+            row = self.schema.parse_row(line.decode(const.CHARSET), dt_day=dt_day)
+            timestamp = row.get("timestamp")
+            if timestamp is not None:
+                if self.last_timestamp is not None and timestamp <= self.last_timestamp:
+                    continue
+                self.last_timestamp = timestamp
+            rows.append(row)
+        return rows
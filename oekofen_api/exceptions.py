@@ -0,0 +1,27 @@
+"""Exceptions of the Oekofen clients"""
+
+from __future__ import annotations
+
+import http.client
+import urllib.error
+
+
+class OekofenAPIException(Exception):
+    pass
+
+
+class ValueOutOfBoundaryError(OekofenAPIException):
+    pass
+
+
+class OekofenHTTPError(OekofenAPIException, urllib.error.HTTPError):
+    """error response of the controller, .code and .status are the HTTP status"""
+
+    def __init__(self, url: str, status: int, reason: str = "", headers=None):
+        urllib.error.HTTPError.__init__(
+            self, url, status, reason or http.client.responses.get(status, ""), headers, None
+        )
+
+
+class CircuitOpenError(OekofenAPIException):
+    """the controller failed repeatedly, requests are rejected until the next probe"""
@@ -0,0 +1,163 @@
+"""Concurrent polling of many controllers"""
+
+from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict
+import logging
+import time
+from typing import Iterable, NamedTuple
+
+from . import const
+from .aio import AsyncOekofen
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class FleetResult(NamedTuple):
+    key: str
+    client: AsyncOekofen
+    data: dict | None
+    error: Exception | None
+    latency: float
+
+
+class HostStats(object):
+    def __init__(self):
+        self.polls = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.last_latency = None
+        self.total_latency = 0.0
+        self.last_error = None
+        self.next_poll = 0.0  # time.monotonic()
+
+    def __repr__(self):
+        cls_name = self.__class__.__name__
+        return f"{cls_name}(polls={self.polls}, failures={self.failures})"
+
+    def get_average_latency(self) -> float | None:
+        if self.polls:
+            return self.total_latency / self.polls
+        return None
+
+    def as_dict(self) -> dict:
+        return {
+            'polls': self.polls,
+            'failures': self.failures,
+            'consecutive_failures': self.consecutive_failures,
+            'last_latency': self.last_latency,
+            'average_latency': self.get_average_latency(),
+            'last_error': self.last_error,
+        }
+
+
+class OekofenFleet(object):
+    """
+    Polls many controllers concurrently, a slow or dead controller never
+    stalls the others:
+
+        fleet = OekofenFleet([("192.168.178.222", "eMlG"), ("10.0.0.5", "abcd", 4321)])
+        async for result in fleet.poll():
+            print(result.key, result.error or result.data["pe1.L_statetext"])
+
+    Failing controllers are skipped with an exponential per-host backoff.
+    """
+
+    def __init__(
+        self,
+        controllers: Iterable[tuple],
+        max_concurrency: int = const.FLEET_MAX_CONCURRENCY,
+        deadline: float = const.FLEET_DEADLINE_SECONDS,
+        backoff: float = const.FLEET_BACKOFF_SECONDS,
+        max_backoff: float = const.FLEET_MAX_BACKOFF_SECONDS,
+        **client_kwargs,
+    ):
+        """
+        :param controllers: (host, json_password) or (host, json_password, port)
+        :param deadline: seconds per controller and poll, including retries,
+            a fetch still running then is cancelled
+        :param client_kwargs: passed to every AsyncOekofen
+        """
+        self.max_concurrency = max_concurrency
+        self.deadline = deadline
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        client_kwargs.setdefault('retries', 0)
+        self.clients = OrderedDict()
+        self.stats = OrderedDict()
+        for controller in controllers:
+            host, json_password, *rest = controller
+            port = rest[0] if rest else const.DEFAULT_PORT
+            key = f"{host}:{port}"
+            self.clients[key] = AsyncOekofen(
+                host=host, json_password=json_password, port=port, **client_kwargs
+            )
+            self.stats[key] = HostStats()
+
+    def __repr__(self):
+        cls_name = self.__class__.__name__
+        return f"{cls_name}({len(self.clients)} controllers)"
+
+    async def poll(self):
+        """
+        Polls all controllers not in backoff, yields a FleetResult as soon as
+        each one finishes
+        """
+        now = time.monotonic()
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        tasks = [
+            asyncio.ensure_future(self._poll_one(key, semaphore))
+            for key, stats in self.stats.items()
+            if stats.next_poll <= now
+        ]
+        try:
+            for task in asyncio.as_completed(tasks):
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def poll_all(self) -> list:
+        return [result async for result in self.poll()]
+
+    async def _poll_one(self, key: str, semaphore: asyncio.Semaphore) -> FleetResult:
+        client = self.clients[key]
+        stats = self.stats[key]
+        async with semaphore:
+            start = time.monotonic()
+            try:
+                await asyncio.wait_for(client.update_data(), timeout=self.deadline)
+            except asyncio.TimeoutError as e:
+                # only the waiting ended, the shielded fetch must be stopped
+                client.cancel_update()
+                error = e
+            except Exception as e:
+                error = e
+            else:
+                error = None
+            latency = time.monotonic() - start
+
+        stats.polls += 1
+        stats.last_latency = latency
+        stats.total_latency += latency
+        if error is None:
+            stats.consecutive_failures = 0
+            stats.last_error = None
+            stats.next_poll = 0.0
+            return FleetResult(key, client, client.data, None, latency)
+
+        stats.failures += 1
+        stats.consecutive_failures += 1
+        stats.last_error = repr(error)
+        delay = min(
+            self.backoff * 2 ** (stats.consecutive_failures - 1), self.max_backoff
+        )
+        stats.next_poll = time.monotonic() + delay
+        _LOGGER.warning(
+            "[OekofenFleet._poll_one] %s failed (%r), next poll in %.0fs", key, error, delay
+        )
+        return FleetResult(key, client, None, error, latency)
+
+    def get_stats(self) -> OrderedDict:
+        return OrderedDict((key, stats.as_dict()) for key, stats in self.stats.items())
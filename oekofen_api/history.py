@@ -0,0 +1,201 @@
+"""
+Short-term in-memory history of the numeric Oekofen.data values
+
+    client.enable_history(capacity=1440, patterns=["pe1.L_modulation", "*.L_temp_act"])
+    client.update_data()
+    ...
+    buffer = client.history.get("pe1.L_modulation")
+    buffer.last(10)                        # [(timestamp, value), ...]
+    buffer.mean(since=time.time() - 3600)
+    buffer.rate(per=60)                    # change per minute, see README
+"""
+
+from __future__ import annotations
+
+from array import array
+from fnmatch import fnmatchcase
+import time
+from typing import Iterable, Mapping
+
+from . import const
+
+
+class RingBuffer(object):
+    """
+    Fixed capacity of (timestamp, value) samples kept in two preallocated
+    float arrays, the oldest sample is overwritten when full
+    """
+
+    __slots__ = ("capacity", "timestamps", "values", "_start", "_count")
+
+    def __init__(self, capacity: int = const.HISTORY_CAPACITY):
+        if capacity < 1:
+            raise ValueError("capacity must be >= 1")
+        self.capacity = capacity
+        self.timestamps = array("d", bytes(8 * capacity))
+        self.values = array("d", bytes(8 * capacity))
+        self._start = 0
+        self._count = 0
+
+    def __repr__(self):
+        cls_name = self.__class__.__name__
+        return f"{cls_name}({self._count}/{self.capacity})"
+
+    def __len__(self):
+        return self._count
+
+    def append(self, timestamp: float, value: float):
+        if self._count < self.capacity:
+            position = (self._start + self._count) % self.capacity
+            self._count += 1
+        else:
+            position = self._start
+            self._start = (self._start + 1) % self.capacity
+        self.timestamps[position] = timestamp
+        self.values[position] = value
+
+    def clear(self):
+        self._start = 0
+        self._count = 0
+
+    def _position(self, nr: int) -> int:
+        """array position of the nr-th oldest sample"""
+        return (self._start + nr) % self.capacity
+
+    def _find(self, since: float | None) -> int:
+        """nr of the oldest sample with timestamp >= since (binary search)"""
+        if since is None:
+            return 0
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self.timestamps[self._position(middle)] < since:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _iter_positions(self, first_nr: int):
+        for nr in range(first_nr, self._count):
+            yield self._position(nr)
+
+    def last(self, n: int) -> list:
+        """:return: the newest `n` samples [(timestamp, value), ...], oldest first"""
+        first_nr = max(self._count - n, 0)
+        return [
+            (self.timestamps[position], self.values[position])
+            for position in self._iter_positions(first_nr)
+        ]
+
+    def since(self, timestamp: float) -> list:
+        """:return: samples with timestamp >= `timestamp`, oldest first"""
+        return [
+            (self.timestamps[position], self.values[position])
+            for position in self._iter_positions(self._find(timestamp))
+        ]
+
+    def min(self, since: float | None = None) -> float | None:
+        return min(self._iter_values(since), default=None)
+
+    def max(self, since: float | None = None) -> float | None:
+        return max(self._iter_values(since), default=None)
+
+    def mean(self, since: float | None = None) -> float | None:
+        total = 0.0
+        count = 0
+        for value in self._iter_values(since):
+            total += value
+            count += 1
+        if not count:
+            return None
+        return total / count
+
+    def rate(self, since: float | None = None, per: float = 1.0) -> float | None:
+        """
+        Change between the oldest and newest sample of the window
+
+        :param per: seconds, i.e. 60 for the change per minute
+        :return: None with less than two samples
+        """
+        first_nr = self._find(since)
+        if self._count - first_nr < 2:
+            return None
+        first = self._position(first_nr)
+        last = self._position(self._count - 1)
+        seconds = self.timestamps[last] - self.timestamps[first]
+        if seconds <= 0:
+            return None
+        return (self.values[last] - self.values[first]) / seconds * per
+
+    def _iter_values(self, since: float | None):
+        values = self.values
+        for position in self._iter_positions(self._find(since)):
+            yield values[position]
+
+
+class History(object):
+    """RingBuffer per numeric data key, optionally limited to glob `patterns`"""
+
+    def __init__(
+        self,
+        capacity: int = const.HISTORY_CAPACITY,
+        patterns: Iterable[str] | None = None,
+    ):
+        if isinstance(patterns, str):
+            patterns = [patterns]
+        self.capacity = capacity
+        self.patterns = list(patterns) if patterns is not None else None
+        self.buffers = {}
+        self._matches = {}
+
+    def __repr__(self):
+        cls_name = self.__class__.__name__
+        return f"{cls_name}({len(self.buffers)} keys, capacity={self.capacity})"
+
+    def __contains__(self, key):
+        return key in self.buffers
+
+    def get(self, key: str) -> RingBuffer | None:
+        return self.buffers.get(key, None)
+
+    def keys(self) -> list:
+        return list(self.buffers)
+
+    def matches(self, key: str) -> bool:
+        if self.patterns is None:
+            return True
+        matches = self._matches.get(key)
+        if matches is None:
+            matches = any(fnmatchcase(key, pattern) for pattern in self.patterns)
+            self._matches[key] = matches
+        return matches
+
+    def record(
+        self,
+        data: Mapping,
+        timestamp: float | None = None,
+        keys: Iterable[str] | None = None,
+    ):
+        """
+        Appends the numeric values of `data` (bools are skipped)
+
+        :param keys: only these keys, default all
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        if keys is None:
+            keys = data
+        buffers = self.buffers
+        for key in keys:
+            if not self.matches(key):
+                continue
+            value = data.get(key)
+            if not isinstance(value, (int, float)) or isinstance(value, bool):
+                continue
+            buffer = buffers.get(key)
+            if buffer is None:
+                buffer = buffers[key] = RingBuffer(self.capacity)
+            buffer.append(timestamp, value)
+
+    def clear(self):
+        self.buffers.clear()
@@ -0,0 +1,33 @@
+"""
+Decoding of the json responses, uses orjson if installed:
+
+    pip install oekofen_api[orjson]
+
+The numeric strings ({"val": "486", "factor": "0.1", ...}) are left as they
+are: factor, min, max and the unit are converted once per AttributeSchema
+(SCHEMA_REGISTRY), the value with the schema's already parsed factor in
+Attribute._set_raw_value.
+"""
+
+from __future__ import annotations
+
+import json
+
+from . import const
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+def loads(raw: bytes, encoding: str = const.CHARSET):
+    """
+    :param raw: response body, only decoded to str if it is not plain ascii
+        (the controller sends ISO-8859-1, json and orjson expect utf-8)
+    """
+    if not raw.isascii():
+        raw = raw.decode(encoding)
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
@@ -0,0 +1,167 @@
+"""
+Pellet consumption estimate from the burner modulation
+
+    estimator = client.enable_pellet_estimator(nominal_power_kw=7.8)
+    estimator.feed_csv_rows(client.iter_csv_log())  # optional, history first
+    client.update_data()                            # every refresh is fed
+    print(estimator.daily, estimator.hourly)        # kg per date / hour
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from datetime import datetime
+from typing import Iterable, Mapping
+
+from . import const
+
+_BURNING_STATES = frozenset(const.PE_STATES_BURNING)
+
+
+class PelletEstimator(object):
+    """
+    Integrates pe<index>.L_modulation over time, one O(1) step per sample:
+
+        kg/h = modulation / 100 * nominal_power_kw / (energy_kwh_per_kg * efficiency)
+
+    Only samples with a burning L_state count. If L_storage_fill is known the
+    estimate is calibrated against the storage bookkeeping of the controller:
+    its drop (refills from storage_fill_today added back) is compared to the
+    uncorrected estimate of the same period, `correction` follows the ratio.
+    An interval is booked to the hour and day it started in.
+    """
+
+    def __init__(
+        self,
+        pe_index: int = 1,
+        nominal_power_kw: float = const.PELLET_NOMINAL_POWER_KW,
+        energy_kwh_per_kg: float = const.PELLET_ENERGY_KWH_PER_KG,
+        efficiency: float = const.PELLET_EFFICIENCY,
+        max_gap_seconds: float = const.PELLET_MAX_GAP_SECONDS,
+        calibration_min_kg: float = const.PELLET_CALIBRATION_MIN_KG,
+        calibration_weight: float = const.PELLET_CALIBRATION_WEIGHT,
+    ):
+        self.pe_index = pe_index
+        self.full_load_kg_per_hour = nominal_power_kw / (energy_kwh_per_kg * efficiency)
+        self.max_gap_seconds = max_gap_seconds
+        self.calibration_min_kg = calibration_min_kg
+        self.calibration_weight = calibration_weight
+        self.correction = 1.0
+        self.total_kg = 0.0
+        self.hourly = OrderedDict()  # datetime (full hour) -> kg
+        self.daily = OrderedDict()  # date -> kg
+        self.samples = 0
+        self._prefix = f"pe{pe_index}."
+        self._csv_modulation = const.CSV_COLUMN_PE_MODULATION.format(index=pe_index)
+        self._csv_state = const.CSV_COLUMN_PE_STATE.format(index=pe_index)
+        self._last_timestamp = None
+        self._last_kg_per_second = 0.0
+        self._reference_fill = None
+        self._reference_fill_today = None
+        self._uncorrected_since_reference = 0.0
+
+    def __repr__(self):
+        cls_name = self.__class__.__name__
+        return f"{cls_name}(pe{self.pe_index}, {self.total_kg:.1f} kg, correction={self.correction:.2f})"
+
+    def get_kg_per_hour(self) -> float:
+        """current consumption rate, corrected"""
+        return self._last_kg_per_second * 3600 * self.correction
+
+    def add_sample(
+        self,
+        timestamp: datetime,
+        modulation: float | None,
+        state: int | None = None,
+        storage_fill: float | None = None,
+        storage_fill_today: float | None = None,
+    ) -> float:
+        """
+        :return: kg of the interval ending with this sample, samples not
+            newer than the last one are ignored
+        """
+        kg = 0.0
+        if self._last_timestamp is not None:
+            seconds = (timestamp - self._last_timestamp).total_seconds()
+            if seconds <= 0:
+                return 0.0
+            if seconds <= self.max_gap_seconds and self._last_kg_per_second:
+                uncorrected_kg = self._last_kg_per_second * seconds
+                self._uncorrected_since_reference += uncorrected_kg
+                kg = uncorrected_kg * self.correction
+                self._book(self._last_timestamp, kg)
+        self._last_timestamp = timestamp
+        self._last_kg_per_second = self._get_kg_per_second(modulation, state)
+        if storage_fill is not None:
+            self._calibrate(storage_fill, storage_fill_today)
+        self.samples += 1
+        return kg
+
+    def feed_data(self, data: Mapping, timestamp: datetime | None = None) -> float:
+        """feeds one Oekofen.data snapshot"""
+        modulation = data.get(f"{self._prefix}L_modulation")
+        if modulation is None:
+            return 0.0
+        return self.add_sample(
+            timestamp or datetime.now(),
+            modulation,
+            state=data.get(f"{self._prefix}L_state"),
+            storage_fill=data.get(f"{self._prefix}L_storage_fill"),
+            storage_fill_today=data.get(f"{self._prefix}storage_fill_today"),
+        )
+
+    def feed_csv_row(self, row: Mapping) -> float:
+        """feeds one parsed /log row, see csvlog.iter_csv_rows"""
+        timestamp = row.get("timestamp")
+        modulation = row.get(self._csv_modulation)
+        if timestamp is None or modulation is None:
+            return 0.0
+        return self.add_sample(timestamp, modulation, state=row.get(self._csv_state))
+
+    def feed_csv_rows(self, rows: Iterable[Mapping]) -> float:
+        kg = 0.0
+        for row in rows:
+            kg += self.feed_csv_row(row)
+        return kg
+
+    def _get_kg_per_second(self, modulation: float | None, state: int | None) -> float:
+        if not modulation or modulation < 0:
+            return 0.0
+        if state is not None and state not in _BURNING_STATES:
+            return 0.0
+        return modulation / 100 * self.full_load_kg_per_hour / 3600
+
+    def _book(self, timestamp: datetime, kg: float):
+        hour = timestamp.replace(minute=0, second=0, microsecond=0)
+        day = timestamp.date()
+        self.hourly[hour] = self.hourly.get(hour, 0.0) + kg
+        self.daily[day] = self.daily.get(day, 0.0) + kg
+        self.total_kg += kg
+
+    def _calibrate(self, storage_fill: float, storage_fill_today: float | None):
+        if self._reference_fill is None:
+            self._set_reference(storage_fill, storage_fill_today)
+            return
+        refilled = 0.0
+        if storage_fill_today is not None and self._reference_fill_today is not None:
+            if storage_fill_today >= self._reference_fill_today:
+                refilled = storage_fill_today - self._reference_fill_today
+            else:
+                # storage_fill_today was reset at midnight
+                refilled = storage_fill_today
+        consumed = self._reference_fill - storage_fill + refilled
+        if consumed < 0:
+            # refilled without storage_fill_today, the consumption is unknown
+            self._set_reference(storage_fill, storage_fill_today)
+            return
+        if consumed < self.calibration_min_kg:
+            return
+        if self._uncorrected_since_reference > 0:
+            ratio = consumed / self._uncorrected_since_reference
+            self.correction += self.calibration_weight * (ratio - self.correction)
+        self._set_reference(storage_fill, storage_fill_today)
+
+    def _set_reference(self, storage_fill: float, storage_fill_today: float | None):
+        self._reference_fill = storage_fill
+        self._reference_fill_today = storage_fill_today
+        self._uncorrected_since_reference = 0.0
@@ -0,0 +1,60 @@
+"""
+Shared, size bounded registries
+"""
+from __future__ import annotations
+from collections import OrderedDict
+import threading
+from typing import Callable, Hashable
+
+
+class SharedRegistry(object):
+    """
+    Hands out one shared value per key, created by `factory` on the first
+    lookup. The least recently used keys are evicted above `maxsize` entries.
+    """
+
+    def __init__(self, factory: Callable, maxsize: int = 256):
+        self.factory = factory
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        cls_name = self.__class__.__name__
+        return f"{cls_name}(size={len(self)}, hits={self.hits}, misses={self.misses})"
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key: Hashable):
+        with self._lock:
+            value = self._entries.get(key, None)
+            if value is not None:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return value
+            self.misses += 1
+            value = self.factory(key)
+            self._entries[key] = value
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_ratio': self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,177 @@
+"""
+Retry policy and per-host circuit breaker, shared by Oekofen and AsyncOekofen
+
+    client = Oekofen(
+        "192.168.178.222", "eMlG",
+        retry_policy=RetryPolicy(retries=3, base_delay=1, max_delay=20),
+    )
+    client.get_retry_stats()
+"""
+
+from __future__ import annotations
+
+import asyncio
+import http.client
+import random
+import threading
+import time
+import urllib.error
+
+from . import const
+
+# client errors that do not go away by asking again
+_PERMANENT_HTTP_STATUS = frozenset([400, 401, 403, 404])
+
+CIRCUIT_CLOSED = 'closed'
+CIRCUIT_OPEN = 'open'
+CIRCUIT_HALF_OPEN = 'half_open'
+
+
+class RetryPolicy(object):
+    """
+    `retries` additional attempts, the n-th retry waits
+    min(base_delay * 2 ** n, max_delay), extended by up to `jitter` (0..1)
+    so many clients do not retry in lockstep. The controller answers too
+    frequent requests with errors, so the delay never drops below base_delay.
+    """
+
+    def __init__(
+        self,
+        retries: int = const.RETRY_COUNT,
+        base_delay: float = const.RETRY_DELAY_SECONDS,
+        max_delay: float = const.RETRY_MAX_DELAY_SECONDS,
+        jitter: float = const.RETRY_JITTER,
+    ):
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+
+    def __repr__(self):
+        cls_name = self.__class__.__name__
+        return f"{cls_name}(retries={self.retries}, base_delay={self.base_delay})"
+
+    def get_delay(self, attempt: int) -> float:
+        """:param attempt: 0 for the first retry"""
+        delay = min(self.base_delay * 2 ** attempt, self.max_delay)
+        return delay * (1 + self.jitter * random.random())
+
+    @staticmethod
+    def is_retryable(error: Exception) -> bool:
+        """timeouts, connection errors and server side HTTP errors"""
+        if isinstance(error, urllib.error.HTTPError):
+            # OekofenHTTPError as well
+            return error.code not in _PERMANENT_HTTP_STATUS
+        return isinstance(
+            error,
+            (
+                TimeoutError,
+                asyncio.TimeoutError,
+                OSError,
+                http.client.HTTPException,
+                asyncio.IncompleteReadError,
+            ),
+        )
+
+
+class CircuitBreaker(object):
+    """
+    Opens after `failure_threshold` consecutive failed requests, requests
+    are rejected then. After `reset_timeout` seconds one probe request is
+    let through, its success closes the circuit, a failure opens it again.
+    A probe that ends without a result (cancelled, see record_aborted) or
+    takes longer than `reset_timeout` is replaced by the next request.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = const.CIRCUIT_FAILURE_THRESHOLD,
+        reset_timeout: float = const.CIRCUIT_RESET_TIMEOUT_SECONDS,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CIRCUIT_CLOSED
+        self.consecutive_failures = 0
+        self.failures = 0
+        self.successes = 0
+        self.rejected = 0
+        self.opened = 0
+        self.last_error = None
+        self._opened_at = None
+        self._probe_started_at = None
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        cls_name = self.__class__.__name__
+        return f"{cls_name}({self.state}, consecutive_failures={self.consecutive_failures})"
+
+    def allow(self) -> bool:
+        """False while open, True for the probe request once `reset_timeout` passed"""
+        with self._lock:
+            if self.state == CIRCUIT_CLOSED:
+                return True
+            now = time.monotonic()
+            if self.state == CIRCUIT_OPEN:
+                probe = now - self._opened_at >= self.reset_timeout
+            else:
+                probe = now - self._probe_started_at >= self.reset_timeout
+            if probe:
+                self.state = CIRCUIT_HALF_OPEN
+                self._probe_started_at = now
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.successes += 1
+            self.consecutive_failures = 0
+            self.state = CIRCUIT_CLOSED
+
+    def record_failure(self, error: Exception):
+        with self._lock:
+            self.failures += 1
+            self.consecutive_failures += 1
+            self.last_error = repr(error)
+            if (
+                self.state == CIRCUIT_HALF_OPEN
+                or self.consecutive_failures >= self.failure_threshold
+            ):
+                if self.state != CIRCUIT_OPEN:
+                    self.opened += 1
+                self.state = CIRCUIT_OPEN
+                self._opened_at = time.monotonic()
+
+    def record_aborted(self):
+        """
+        The request ended without success or failure (i.e. cancelled), a
+        pending probe is given up so the next request probes again
+        """
+        with self._lock:
+            if self.state == CIRCUIT_HALF_OPEN:
+                # _opened_at is older than reset_timeout, allow() probes at once
+                self.state = CIRCUIT_OPEN
+
+    def get_stats(self) -> dict:
+        return {
+            'state': self.state,
+            'consecutive_failures': self.consecutive_failures,
+            'failures': self.failures,
+            'successes': self.successes,
+            'rejected': self.rejected,
+            'opened': self.opened,
+            'last_error': self.last_error,
+        }
+
+
+_CIRCUIT_BREAKERS = {}
+_CIRCUIT_BREAKERS_LOCK = threading.Lock()
+
+
+def get_circuit_breaker(host_key: str) -> CircuitBreaker:
+    """one CircuitBreaker per "host:port", shared by all clients of the process"""
+    with _CIRCUIT_BREAKERS_LOCK:
+        breaker = _CIRCUIT_BREAKERS.get(host_key)
+        if breaker is None:
+            breaker = _CIRCUIT_BREAKERS[host_key] = CircuitBreaker()
+        return breaker
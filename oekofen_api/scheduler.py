@@ -0,0 +1,243 @@
+"""
+Adaptive polling, the interval follows the burner state
+
+    scheduler = PollScheduler(min_interval=2, max_interval=300)
+    scheduler.run_forever(client, callback=print)      # Oekofen
+    await scheduler.async_run_forever(client)          # AsyncOekofen
+    scheduler.get_stats()
+"""
+
+from __future__ import annotations
+
+import asyncio
+from fnmatch import fnmatchcase
+import logging
+import threading
+import time
+from typing import Callable, Iterable, Mapping
+
+from . import const
+
+_LOGGER = logging.getLogger(__name__)
+
+_FAST_STATES = frozenset([const.PE_STATE_START, const.PE_STATE_FIRING])
+_OFF_STATES = frozenset(const.PE_STATES_OFF)
+
+
+class KeyStats(object):
+    def __init__(self):
+        self.changes = 0
+        self.total_staleness = 0.0
+
+    def __repr__(self):
+        cls_name = self.__class__.__name__
+        return f"{cls_name}(changes={self.changes})"
+
+    def get_average_staleness(self) -> float | None:
+        if self.changes:
+            return self.total_staleness / self.changes
+        return None
+
+
+class PollScheduler(object):
+    """
+    Picks the next poll interval from
+
+    - the pe L_state: min_interval while a burner starts or ignites,
+      max_interval while all burners are off, otherwise `interval`
+    - how often the watched keys changed lately, frequent changes move the
+      interval towards min_interval
+    - the response latency, a poll is at most every `latency_factor`
+      latencies
+
+    The staleness of a watched key is estimated per detected change as half
+    the interval it was detected in (the change happened somewhere in it).
+    """
+
+    def __init__(
+        self,
+        min_interval: float = const.SCHEDULER_MIN_INTERVAL_SECONDS,
+        max_interval: float = const.SCHEDULER_MAX_INTERVAL_SECONDS,
+        interval: float = const.UPDATE_INTERVAL_SECONDS,
+        watch: Iterable[str] = const.SCHEDULER_WATCH,
+        latency_factor: float = const.SCHEDULER_LATENCY_FACTOR,
+        activity_weight: float = const.SCHEDULER_ACTIVITY_WEIGHT,
+    ):
+        """:param watch: keys or glob patterns of self.data"""
+        if not 0 < min_interval <= max_interval:
+            raise ValueError("0 < min_interval <= max_interval required")
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min(max(interval, min_interval), max_interval)
+        self.watch = [watch] if isinstance(watch, str) else list(watch)
+        self.latency_factor = latency_factor
+        self.activity_weight = activity_weight
+        self.activity = 0.0  # moving average of "a watched key changed"
+        self.latency = None  # moving average, seconds
+        self.next_interval = self.interval
+        self.polls = 0
+        self.failures = 0
+        self.key_stats = {}
+        self._first_poll = None
+        self._last_poll = None
+        self._last_values = {}
+        self._matches = {}
+
+    def __repr__(self):
+        cls_name = self.__class__.__name__
+        return f"{cls_name}(next_interval={self.next_interval:.1f}s, polls={self.polls})"
+
+    def matches(self, key: str) -> bool:
+        matches = self._matches.get(key)
+        if matches is None:
+            matches = any(fnmatchcase(key, pattern) for pattern in self.watch)
+            self._matches[key] = matches
+        return matches
+
+    def record_poll(
+        self, data: Mapping, latency: float, timestamp: float | None = None
+    ) -> float:
+        """
+        Feeds a finished poll
+
+        :return: seconds from the end of this poll to the next one
+        """
+        if timestamp is None:
+            timestamp = time.monotonic()
+        elapsed = None
+        if self._last_poll is not None:
+            elapsed = timestamp - self._last_poll
+        else:
+            self._first_poll = timestamp
+        self._last_poll = timestamp
+        self.polls += 1
+        self._record_latency(latency)
+
+        changed = False
+        for key in data:
+            if not self.matches(key):
+                continue
+            value = data[key]
+            old_value = self._last_values.get(key, value)
+            self._last_values[key] = value
+            if old_value == value or elapsed is None:
+                continue
+            changed = True
+            stats = self.key_stats.get(key)
+            if stats is None:
+                stats = self.key_stats[key] = KeyStats()
+            stats.changes += 1
+            stats.total_staleness += elapsed / 2
+        if elapsed is not None:
+            self.activity += self.activity_weight * (float(changed) - self.activity)
+
+        self.next_interval = self.get_interval(data)
+        return self.next_interval
+
+    def record_failure(self, latency: float) -> float:
+        self.failures += 1
+        self._record_latency(latency)
+        return self.next_interval
+
+    def _record_latency(self, latency: float):
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency += self.activity_weight * (latency - self.latency)
+
+    def get_interval(self, data: Mapping) -> float:
+        states = self._get_pe_states(data)
+        if states & _FAST_STATES:
+            interval = self.min_interval
+        elif states and states <= _OFF_STATES:
+            interval = self.max_interval
+        else:
+            interval = self.interval
+        interval -= (interval - self.min_interval) * self.activity
+        if self.latency is not None:
+            interval = max(interval, self.latency * self.latency_factor)
+        return min(max(interval, self.min_interval), self.max_interval)
+
+    @staticmethod
+    def _get_pe_states(data: Mapping) -> set:
+        states = set()
+        for index in data.get("pe_indexes", []):
+            state = data.get(f"pe{index}.L_state")
+            if state is not None:
+                states.add(state)
+        return states
+
+    def get_stats(self) -> dict:
+        """achieved poll rate (polls per minute) and staleness per watched key"""
+        poll_rate = None
+        average_interval = None
+        if self.polls > 1:
+            average_interval = (self._last_poll - self._first_poll) / (self.polls - 1)
+            if average_interval > 0:
+                poll_rate = 60 / average_interval
+        return {
+            'polls': self.polls,
+            'failures': self.failures,
+            'poll_rate': poll_rate,
+            'average_interval': average_interval,
+            'next_interval': self.next_interval,
+            'latency': self.latency,
+            'activity': self.activity,
+            'staleness': {
+                key: stats.get_average_staleness()
+                for key, stats in sorted(self.key_stats.items())
+            },
+        }
+
+    def run_forever(
+        self,
+        client,
+        callback: Callable | None = None,
+        stop_event: threading.Event | None = None,
+    ):
+        """
+        Polls `client` (Oekofen) until `stop_event` is set, `callback`
+        receives client.data after each successful poll. The caching of
+        client.update_data is lowered to min_interval meanwhile.
+        """
+        if stop_event is None:
+            stop_event = threading.Event()
+        update_interval = client.update_interval
+        client.update_interval = self.min_interval
+        try:
+            while not stop_event.is_set():
+                start = time.monotonic()
+                try:
+                    client.update_data()
+                except Exception as e:
+                    delay = self.record_failure(time.monotonic() - start)
+                    _LOGGER.warning("[PollScheduler.run_forever] poll failed: %r", e)
+                else:
+                    delay = self.record_poll(client.data, time.monotonic() - start)
+                    if callback is not None:
+                        callback(client.data)
+                stop_event.wait(delay)
+        finally:
+            client.update_interval = update_interval
+
+    async def async_run_forever(self, client, callback: Callable | None = None):
+        """run_forever for AsyncOekofen, ends when the task is cancelled"""
+        update_interval = client.update_interval
+        client.update_interval = self.min_interval
+        try:
+            while True:
+                start = time.monotonic()
+                try:
+                    await client.update_data()
+                except Exception as e:
+                    delay = self.record_failure(time.monotonic() - start)
+                    _LOGGER.warning(
+                        "[PollScheduler.async_run_forever] poll failed: %r", e
+                    )
+                else:
+                    delay = self.record_poll(client.data, time.monotonic() - start)
+                    if callback is not None:
+                        callback(client.data)
+                await asyncio.sleep(delay)
+        finally:
+            client.update_interval = update_interval
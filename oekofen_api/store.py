@@ -0,0 +1,212 @@
+"""
+Persistent local store (SQLite) of the numeric values with hourly statistics
+
+    store = client.enable_store("oekofen.sqlite")
+    store.add_csv_rows(client.iter_csv_log())  # import, re-imports are deduplicated
+    client.update_data()                       # every refresh is stored
+    store.get_hourly("pe1.L_modulation", start=datetime(2026, 1, 1))
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+import sqlite3
+import threading
+import time
+from typing import Iterable, Mapping, NamedTuple
+
+from . import const
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS samples (
+    key TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (key, ts)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS hourly (
+    key TEXT NOT NULL,
+    hour INTEGER NOT NULL,
+    n INTEGER NOT NULL,
+    total REAL NOT NULL,
+    minimum REAL NOT NULL,
+    maximum REAL NOT NULL,
+    PRIMARY KEY (key, hour)
+) WITHOUT ROWID;
+CREATE TEMP TABLE IF NOT EXISTS staging (
+    key TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (key, ts)
+) WITHOUT ROWID;
+"""
+
+# only samples not stored yet are aggregated, then stored
+_AGGREGATE_STAGING = """
+INSERT INTO hourly (key, hour, n, total, minimum, maximum)
+SELECT s.key, s.ts - s.ts % 3600 AS hour, count(*), sum(s.value), min(s.value), max(s.value)
+FROM staging s
+WHERE NOT EXISTS (SELECT 1 FROM samples x WHERE x.key = s.key AND x.ts = s.ts)
+GROUP BY s.key, hour
+ON CONFLICT (key, hour) DO UPDATE SET
+    n = n + excluded.n,
+    total = total + excluded.total,
+    minimum = min(minimum, excluded.minimum),
+    maximum = max(maximum, excluded.maximum)
+"""
+_STORE_STAGING = "INSERT OR IGNORE INTO samples (key, ts, value) SELECT key, ts, value FROM staging"
+
+
+class HourlyStatistic(NamedTuple):
+    start: datetime
+    mean: float
+    min: float
+    max: float
+    sum: float
+    count: int
+
+
+class LocalStore(object):
+    """
+    Append-only samples (key, unix timestamp, value), a sample is stored
+    once per key and second. The hourly count/sum/min/max are updated with
+    every insert, so statistics never re-read the samples.
+    """
+
+    def __init__(self, path: str):
+        """:param path: sqlite file, ":memory:" for a temporary store"""
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+
+    def __repr__(self):
+        cls_name = self.__class__.__name__
+        return f"{cls_name}({self.path})"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def add_samples(self, samples: Iterable[tuple]) -> int:
+        """
+        :param samples: (key, timestamp, value), timestamp as datetime or unix seconds
+        :return: number of new samples, duplicates are skipped
+        """
+        rows = [(key, _to_unix(timestamp), value) for key, timestamp, value in samples]
+        if not rows:
+            return 0
+        with self._lock, self._db:
+            db = self._db
+            db.executemany(
+                "INSERT OR IGNORE INTO staging (key, ts, value) VALUES (?, ?, ?)", rows
+            )
+            db.execute(_AGGREGATE_STAGING)
+            added = db.execute(_STORE_STAGING).rowcount
+            db.execute("DELETE FROM staging")
+        return added
+
+    def add_data(
+        self,
+        data: Mapping,
+        timestamp: datetime | float | None = None,
+        keys: Iterable[str] | None = None,
+    ) -> int:
+        """
+        Stores the numeric values of one Oekofen.data snapshot
+
+        :param keys: only these keys, default all
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        if keys is None:
+            keys = data
+        samples = []
+        for key in keys:
+            value = data.get(key)
+            if _is_number(value):
+                samples.append((key, timestamp, value))
+        return self.add_samples(samples)
+
+    def add_csv_rows(
+        self, rows: Iterable[Mapping], prefix: str = const.STORE_CSV_KEY_PREFIX
+    ) -> int:
+        """
+        Stores the numeric columns of parsed /log rows as "<prefix><column>"
+
+        :return: number of new samples
+        """
+        samples = []
+        for row in rows:
+            timestamp = row.get("timestamp")
+            if timestamp is None:
+                continue
+            for name, value in row.items():
+                if _is_number(value):
+                    samples.append((f"{prefix}{name}", timestamp, value))
+        return self.add_samples(samples)
+
+    def keys(self) -> list:
+        with self._lock:
+            return [
+                key for (key,) in self._db.execute("SELECT DISTINCT key FROM hourly ORDER BY key")
+            ]
+
+    def get_samples(
+        self, key: str, start: datetime | None = None, end: datetime | None = None
+    ) -> list:
+        """:return: [(datetime, value), ...] with start <= datetime < end"""
+        where, params = _get_range(key, "ts", start, end)
+        with self._lock:
+            cursor = self._db.execute(
+                f"SELECT ts, value FROM samples WHERE {where} ORDER BY ts", params
+            )
+            return [(datetime.fromtimestamp(ts), value) for ts, value in cursor]
+
+    def get_hourly(
+        self, key: str, start: datetime | None = None, end: datetime | None = None
+    ) -> list:
+        """:return: [HourlyStatistic, ...] of the hours starting in [start, end)"""
+        where, params = _get_range(key, "hour", start, end)
+        with self._lock:
+            cursor = self._db.execute(
+                "SELECT hour, n, total, minimum, maximum FROM hourly "
+                f"WHERE {where} ORDER BY hour",
+                params,
+            )
+            return [
+                HourlyStatistic(
+                    datetime.fromtimestamp(hour), total / n, minimum, maximum, total, n
+                )
+                for hour, n, total, minimum, maximum in cursor
+            ]
+
+
+def _to_unix(timestamp) -> int:
+    if isinstance(timestamp, datetime):
+        return int(timestamp.timestamp())
+    return int(timestamp)
+
+
+def _get_range(key: str, column: str, start, end) -> tuple:
+    where = ["key = ?"]
+    params = [key]
+    if start is not None:
+        where.append(f"{column} >= ?")
+        params.append(_to_unix(start))
+    if end is not None:
+        where.append(f"{column} < ?")
+        params.append(_to_unix(end))
+    return " AND ".join(where), params
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
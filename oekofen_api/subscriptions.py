@@ -0,0 +1,82 @@
+"""Change subscriptions on the flattened Oekofen.data keys"""
+
+from __future__ import annotations
+
+from fnmatch import fnmatchcase
+from typing import Callable, Iterable
+
+_GLOB_CHARS = frozenset("*?[")
+
+
+class Subscription(object):
+    """
+    Interest in keys ("pe1.L_modulation") or glob patterns ("pe1.*",
+    "*.L_statetext"). `callback` receives one list of (key, old, new) per
+    refresh with changes. Numeric changes smaller than `deadband` (compared
+    to the last delivered value) are not delivered.
+    """
+
+    def __init__(
+        self,
+        patterns: str | Iterable[str],
+        callback: Callable[[list], None],
+        deadband: float | None = None,
+    ):
+        if isinstance(patterns, str):
+            patterns = [patterns]
+        self.keys = set()
+        self.patterns = []
+        for pattern in patterns:
+            if _GLOB_CHARS.intersection(pattern):
+                self.patterns.append(pattern)
+            else:
+                self.keys.add(pattern)
+        self.callback = callback
+        self.deadband = deadband
+        self.last_values = {}
+        self._matches = {}
+
+    def __repr__(self):
+        cls_name = self.__class__.__name__
+        return f"{cls_name}({sorted(self.keys) + self.patterns})"
+
+    def matches(self, key: str) -> bool:
+        if key in self.keys:
+            return True
+        if not self.patterns:
+            return False
+        matches = self._matches.get(key)
+        if matches is None:
+            matches = any(fnmatchcase(key, pattern) for pattern in self.patterns)
+            self._matches[key] = matches
+        return matches
+
+    def seed(self, data: dict):
+        """remembers the current values, so the first change has an old value"""
+        for key in data:
+            if self.matches(key):
+                self.last_values[key] = data[key]
+
+    def diff(self, changed_keys: Iterable[str], data: dict) -> list:
+        """:return: [(key, old, new), ...] to deliver"""
+        changes = []
+        for key in changed_keys:
+            if not self.matches(key):
+                continue
+            old = self.last_values.get(key, None)
+            new = data.get(key, None)
+            if old == new:
+                continue
+            if self.deadband and _is_number(old) and _is_number(new):
+                if abs(new - old) < self.deadband:
+                    continue
+            if key in data:
+                self.last_values[key] = new
+            else:
+                self.last_values.pop(key, None)
+            changes.append((key, old, new))
+        return changes
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
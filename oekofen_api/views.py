@@ -0,0 +1,99 @@
+"""Read-only lazy views of Oekofen.data and Domain.attributes"""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+from typing import Callable
+
+_MISSING = object()
+
+
+class LazyData(Mapping):
+    """
+    Same keys (and order) as the eager Oekofen.data dict, but attribute
+    entries are decoded on first access and memoized until their getter is
+    replaced (see set_getter)
+    """
+
+    def __init__(self):
+        # key -> (getter, attribute) or (None, static value)
+        self._sources = {}
+        self._memo = {}
+
+    def __repr__(self):
+        cls_name = self.__class__.__name__
+        return f"{cls_name}({len(self._sources)} keys, {len(self._memo)} decoded)"
+
+    def __getitem__(self, key):
+        value = self._memo.get(key, _MISSING)
+        if value is _MISSING:
+            getter, source = self._sources[key]
+            if getter is None:
+                return source
+            value = self._memo[key] = getter(source)
+        return value
+
+    def __contains__(self, key):
+        return key in self._sources
+
+    def __iter__(self):
+        return iter(self._sources)
+
+    def __len__(self):
+        return len(self._sources)
+
+    def copy(self) -> LazyData:
+        """shallow copy, shares the attributes and the decoded values so far"""
+        data = self.__class__()
+        data._sources = self._sources.copy()
+        data._memo = self._memo.copy()
+        return data
+
+    def set_value(self, key: str, value):
+        self._sources[key] = (None, value)
+
+    def set_getter(self, key: str, getter: Callable, source):
+        """`getter(source)` computes the value on first access"""
+        self._sources[key] = (getter, source)
+        self._memo.pop(key, None)
+
+
+class LazyAttributes(Mapping):
+    """
+    Domain.attributes in lazy_attributes mode, keeps the raw json of the
+    domain and creates an Attribute on first access
+    """
+
+    __slots__ = ("_factory", "_raw", "_attributes")
+
+    def __init__(self, factory: Callable, raw: dict):
+        """:param factory: factory(key, raw json) -> Attribute"""
+        self._factory = factory
+        self._raw = raw
+        self._attributes = {}
+
+    def __repr__(self):
+        cls_name = self.__class__.__name__
+        return f"{cls_name}({len(self._raw)} keys, {len(self._attributes)} created)"
+
+    def __getitem__(self, key):
+        att = self._attributes.get(key)
+        if att is None:
+            att = self._attributes[key] = self._factory(key, self._raw[key])
+        return att
+
+    def __contains__(self, key):
+        return key in self._raw
+
+    def __iter__(self):
+        return iter(self._raw)
+
+    def __len__(self):
+        return len(self._raw)
+
+    def replace(self, key: str, att) -> LazyAttributes:
+        """a new view with `att` for `key`, this one stays unchanged"""
+        attributes = self.__class__(self._factory, self._raw)
+        attributes._attributes = self._attributes.copy()
+        attributes._attributes[key] = att
+        return attributes
@@ -20,6 +20,10 @@ setup(
         'voluptuous>=0.13.1',
         'yarl>=1.8.1'
     ],
+    extras_require={
+        'numpy': ['numpy'],
+        'orjson': ['orjson'],
+    },
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: MIT License",